@@ -0,0 +1,71 @@
+class CivilizationGroups:
+    def __init__(self):
+        """
+        Index of the live members of every civilization group, with per-group energy and member counters
+        maintained incrementally as civilizations are born, grow and die.
+        """
+        self._members = {}  # {group_id: {civ_id: civilization}} in joining order
+        self._energy = {}  # {civ_id: energy last accounted in its group total}
+        self.total_energy = {}  # {group_id: summed energy consumption of the live members}
+        self.member_count = {}  # {group_id: number of live members}
+
+    def new_group_id(self):
+        """
+        Returns the id for a new group. Groups are never reused, even once all their members died.
+        """
+        return len(self._members)
+
+    def add(self, civilization):
+        """
+        Registers a new live member of `civilization.group_id`, creating the group if needed.
+        """
+        group_id = civilization.group_id
+        if group_id not in self._members:
+            self._members[group_id] = {}
+            self.total_energy[group_id] = 0
+            self.member_count[group_id] = 0
+        self._members[group_id][civilization.civ_id] = civilization
+        self._energy[civilization.civ_id] = civilization.energy_consumption
+        self.total_energy[group_id] += civilization.energy_consumption
+        self.member_count[group_id] += 1
+
+    def remove(self, civilization):
+        """
+        Removes a dead civilization from its group.
+        """
+        group_id = civilization.group_id
+        if self._members.get(group_id, {}).pop(civilization.civ_id, None) is None:
+            return
+        self.total_energy[group_id] -= self._energy.pop(civilization.civ_id)
+        self.member_count[group_id] -= 1
+
+    def update_energy(self, civilization):
+        """
+        Accounts the change in a live member's energy consumption since it was last reported.
+        """
+        previous_energy = self._energy.get(civilization.civ_id)
+        if previous_energy is None:
+            return
+        self._energy[civilization.civ_id] = civilization.energy_consumption
+        self.total_energy[civilization.group_id] += civilization.energy_consumption - previous_energy
+
+    def members(self, group_id):
+        """
+        Returns the live members of a group, in joining order.
+        """
+        return list(self._members.get(group_id, {}).values())
+
+    def items(self):
+        """
+        Iterates (group_id, live members) pairs for every group ever created.
+        """
+        return ((group_id, list(members.values())) for group_id, members in self._members.items())
+
+    def __getitem__(self, group_id):
+        return self.members(group_id)
+
+    def __contains__(self, group_id):
+        return group_id in self._members
+
+    def __len__(self):
+        return len(self._members)
@@ -1,23 +1,42 @@
-import random
 import math
+import heapq
+from Random_Streams_Module import LegacyRandom
+from Threat_Index_Module import ThreatIndex, COMPACT_RATIO
 import numpy as np
 import sys
 #import matplotlib.pyplot as plt
 
+LAZY_SURVEY_STARS = 64  # Catalog stars a civilization of a procedural catalog surveys each time it runs out of targets
 
 
 class Civilization:
-    def __init__(self, seed, star_system,civ_id,group_id,star_map):
+    def __init__(self, seed, star_system,civ_id,group_id,star_map,civilization_groups=None,awareness_radius=None,random_gen=None,intelligence_ledger=None,attack_planner="scan",known_stars=None):
         """
         Initializes the Civilization with a deterministic seed and a reference to the StarSystem.
 
         Parameters:
         - seed (int): Seed for deterministic random number generation.
         - star_system (StarSystem): Instance of the star system providing dynamic energy budgets and dangers.
+        - civilization_groups (CivilizationGroups): Optional group membership index used to find allies.
+        - awareness_radius (float): Optional radius in light years of the initial awareness horizon. The horizon
+          grows by this radius whenever the attack planner runs out of targets, and distant stars are added as
+          messages reveal them. None makes every star of the galaxy known from birth, except on procedural
+          catalogs: their awareness map starts with the civilization's own star and `known_stars`, and surveys
+          LAZY_SURVEY_STARS more catalog stars whenever the attack planner runs out of targets.
+        - random_gen (LegacyRandom or CounterRandom): Optional random stream from the cosmos RandomStreams,
+          instead of a sequential generator seeded with `seed`.
+        - intelligence_ledger (IntelligenceLedger): Optional group ledger the civilization publishes its observations to
+          and reads allied intelligence from, instead of exchanging it with its allies in messages.
+        - attack_planner (str): "scan" plans attacks by scanning the whole awareness map every year; "indexed"
+          reads the strongest enemy and the nearest colonization candidate from a ThreatIndex kept up to date
+          as the awareness map changes.
+        - known_stars (list): Star indexes known from birth on procedural catalogs, e.g. the stars the cosmos
+          already materialized.
         """
         self.seed = seed
         self.star_map=star_map
-        self.random_gen = random.Random(seed)  # Independent random generator for reproducibility
+        self.civilization_groups = civilization_groups
+        self.random_gen = random_gen if random_gen is not None else LegacyRandom(seed)  # Independent random generator for reproducibility
         self.civ_id = civ_id
         self.group_id = group_id
         # Star system reference
@@ -28,45 +47,148 @@ class Civilization:
         self.growth_rate = 1
         self.kardashev_level = 0
         self.extinction_risk = 0.0
+        self.forced_extinction = False  # Next extinction check triggers without a draw
         self.germination_event = 0.0
+        self.total_energy_available = 0
+        self.attack_energy = 0
         self.colonization_attack=None
+        self.comms=None
+        self.awareness_radius = awareness_radius
+        self.awareness_horizon = awareness_radius  # Current radius of the awareness map (None when it covers the galaxy)
+        self.intelligence_ledger = intelligence_ledger
+        self.fact_visibility = {}  # {star_index: year from which a newer allied fact about the star is visible here}
+        self._visibility_queue = []  # Min-heap of the (year, star_index) entries of fact_visibility
+        self._ledger_cursor = None  # Next change of the group ledger to read (None before the first read)
+        # Catalog stars after this civilization's star already surveyed (None unless the catalog is procedural)
+        self._survey_cursor = 0 if awareness_radius is None and star_map.positions is None else None
         # Initialize awareness map
-        self.awareness_map=self._initialize_awareness_map()
+        self.awareness_map=self._initialize_awareness_map(known_stars or ())
+        self.threat_index = None  # ThreatIndex of the awareness map ("indexed" attack planner only)
+        if attack_planner == "indexed":
+            self.rebuild_threat_index()
         
-    def _initialize_awareness_map(self):
+    def _initialize_awareness_map(self, known_stars):
         """
-        Generates the initial awareness map from the star map.
+        Generates the initial awareness map from the star map, or from the stars within the
+        awareness radius when one is set. Procedural catalogs start from the known stars only, as listing
+        the whole catalog would derive every star of the galaxy.
         Includes indexes, types, positions, and relative distances.
         """
+        if self._survey_cursor is not None:
+            star_indexes = sorted(set(known_stars) | {self.star_system.index})
+            star_items = ((star_index, self.star_map[star_index]) for star_index in star_indexes)
+        elif self.awareness_radius is None:
+            star_items = self.star_map.items()
+        else:
+            star_indexes = self.star_map.neighbours(self.star_system.position, self.awareness_radius)
+            if self.star_system.index not in star_indexes:
+                star_indexes.append(self.star_system.index)
+            star_items = ((star_index, self.star_map[star_index]) for star_index in star_indexes)
         awareness_map = {}
-        for star_index, star_data in self.star_map.items():
-            position = star_data["position"]
-            star_type = star_data["type"]
-            distance = self._calculate_distance(position, self.star_system.position)
-            awareness_map[star_index] = {
-                "type": star_type,
-                "position": position,
-                "distance": distance,
-                "civilization_id": None,  # Initially unknown
-                "group_id": None,  # Initially unknown
-                "relationship": None,  # Initially unknown
-                "time_stamp": -1,  # No updates yet
-                "known_energy": None, # No updates yet
-
-            }
-            if star_index==self.star_system.index:
-                awareness_map[star_index]["civilization_id"] = self.civ_id
-                awareness_map[star_index]["group_id"] = self.group_id
-                awareness_map[star_index]["relationship"] = "self"
+        for star_index, star_data in star_items:
+            awareness_map[star_index] = self._awareness_entry(star_index, star_data)
         return awareness_map
 
+    def _awareness_entry(self, star_index, star_data):
+        """
+        Returns the initial awareness map entry of a star.
+        """
+        position = star_data["position"]
+        star_type = star_data["type"]
+        distance = self._star_distance(star_index, position)
+        entry = {
+            "type": star_type,
+            "position": position,
+            "distance": distance,
+            "civilization_id": None,  # Initially unknown
+            "group_id": None,  # Initially unknown
+            "relationship": None,  # Initially unknown
+            "time_stamp": -1,  # No updates yet
+            "known_energy": None, # No updates yet
+
+        }
+        if star_index==self.star_system.index:
+            entry["civilization_id"] = self.civ_id
+            entry["group_id"] = self.group_id
+            entry["relationship"] = "self"
+        return entry
+
+    def _become_aware(self, star_index):
+        """
+        Adds a star outside the awareness horizon to the awareness map, e.g. one revealed by a message.
+        """
+        if star_index not in self.awareness_map:
+            self.awareness_map[star_index] = self._awareness_entry(star_index, self.star_map[star_index])
+            self._index_star(star_index)
+
+    def _index_star(self, star_index):
+        """
+        Updates the threat index after the awareness map entry of `star_index` was added or changed.
+        """
+        if self.threat_index is not None:
+            self.threat_index.update(star_index, self.awareness_map[star_index])
+
+    def rebuild_threat_index(self):
+        """
+        Indexes the whole awareness map again, e.g. after it was replaced by a copy from a worker process.
+        """
+        self.threat_index = ThreatIndex()
+        for star_index, entry in self.awareness_map.items():
+            self.threat_index.update(star_index, entry)
+
+    def max_known_danger(self):
+        """
+        Returns the highest known energy among enemy stars, or 0 if none is known.
+        """
+        if self.threat_index is not None:
+            return max(0, self.threat_index.strongest_enemy()[1])
+        return max((data["known_energy"] for data in self.awareness_map.values()
+                    if data["relationship"] == "Enemy" and data["known_energy"] is not None), default=0)
+
+    def _extend_awareness(self):
+        """
+        Grows the awareness horizon by one awareness radius and adds the stars it now covers. On procedural
+        catalogs, surveys the next LAZY_SURVEY_STARS catalog stars after this civilization's star instead.
+
+        Returns:
+        - bool: False if the awareness map already covers the whole galaxy.
+        """
+        if self._survey_cursor is not None:
+            num_star_systems = len(self.star_map)
+            if self._survey_cursor >= num_star_systems - 1:
+                return False
+            surveyed = range(self._survey_cursor + 1, min(self._survey_cursor + LAZY_SURVEY_STARS, num_star_systems - 1) + 1)
+            self._survey_cursor = surveyed[-1]
+            for offset in surveyed:
+                self._become_aware((self.star_system.index + offset) % num_star_systems)
+            return True
+        if self.awareness_horizon is None:
+            return False
+        self.awareness_horizon += self.awareness_radius
+        for star_index in self.star_map.neighbours(self.star_system.position, self.awareness_horizon):
+            self._become_aware(star_index)
+        if self.awareness_horizon >= self.star_map.length_simulation * 3 ** 0.5:
+            self.awareness_horizon = None  # The horizon spans the galaxy diagonal
+        return True
+
+    def _star_distance(self, star_index, position=None):
+        """
+        Returns the distance from this civilization's star to the star at `star_index`, read from the distance
+        matrix of the star catalog when it has one, else calculated from the star's `position`.
+        """
+        if self.star_map.distances is not None:
+            return self.star_map.distance(star_index, self.star_system.index)
+        if position is None:
+            position = self.star_map[star_index]["position"]
+        return self._calculate_distance(position, self.star_system.position)
+
     def _calculate_distance(self, pos1, pos2):
         """
         Calculates the Euclidean distance between two positions in 3D space.
         """
         return sum((pos1[i] - pos2[i]) ** 2 for i in range(3)) ** 0.5
 
-    def _calculate_extinction_risk(self, total_energy_available):
+    def _calculate_extinction_risk(self, total_energy_available, global_time):
         """
         Calculates the extinction risk based on rapid growth during scarcity
         and incorporating dangers from the star system.
@@ -76,11 +198,13 @@ class Civilization:
         self.extinction_risk_probability = 1e-8*scarcity_factor
 
         # Check if the event should trigger
-        if self.random_gen.random() < self.extinction_risk_probability:
+        random_gen = self.random_gen.at(global_time, "extinction")
+        if self.forced_extinction or random_gen.random() < self.extinction_risk_probability:
             self.extinction_risk = (
-            total_energy_available * math.exp(-0.5*((((1 - abs(self.random_gen.gauss(0, (scarcity_factor +1) / 3))) - 0)/( 1 / 9)) ** 2)))
+            total_energy_available * math.exp(-0.5*((((1 - abs(random_gen.gauss(0, (scarcity_factor +1) / 3))) - 0)/( 1 / 9)) ** 2)))
         else:
             self.extinction_risk = 0
+        self.forced_extinction = False
 
         #(1 * math.exp(-(((1 - abs(self.random_gen.gauss(0, 1 / 3))) - 0) ** 2) /(2 * ((1 + 1.0001) / 3000) ** 2)))
         
@@ -116,47 +240,41 @@ class Civilization:
         """
         Updates the civilization's Kardashev level based on energy consumption.
         """
-        energy_budget = self.star_system.get_parameters()
-        if self.energy_consumption >= energy_budget['star_energy_power']+energy_budget['planets_power']+energy_budget['germination_planet_power']:
+        limit_KL_2, limit_KL_3, limit_KL_4 = self.star_system.budget_thresholds
+        if self.energy_consumption >= limit_KL_4:
             self.kardashev_level = 4
-        elif self.energy_consumption >= energy_budget['planets_power']+energy_budget['germination_planet_power']:
+        elif self.energy_consumption >= limit_KL_3:
             self.kardashev_level = 3
-        elif self.energy_consumption >= energy_budget['germination_planet_power']:
+        elif self.energy_consumption >= limit_KL_2:
             self.kardashev_level = 2
-        elif self.energy_consumption > 0 and self.energy_consumption < energy_budget['germination_planet_power']:
+        elif self.energy_consumption > 0:
             self.kardashev_level = 1
         else:
             self.kardashev_level = 0
 
+    def energy_budget(self):
+        """
+        Returns the total energy available to the civilization at its current Kardashev level.
+        """
+        budget_tiers = self.star_system.budget_tiers
+        if self.kardashev_level >= 3:
+            return budget_tiers[2]
+        elif self.kardashev_level == 2:
+            return budget_tiers[1]
+        return budget_tiers[0]
+
     def update(self,global_time,attack_energy,communications_list):
         """
         Updates the civilization's parameters for the current time step.
         """
         #self.star_system.update(global_time)  # Update the star system for the current time step
-        energy_budget = self.star_system.get_parameters()
-        self.limit_KL_2=energy_budget['germination_planet_power']
-        self.limit_KL_3=energy_budget['germination_planet_power']+energy_budget['planets_power']
-        self.limit_KL_4=energy_budget['germination_planet_power']+energy_budget['planets_power']+energy_budget['star_energy_power']
+        self.limit_KL_2, self.limit_KL_3, self.limit_KL_4 = self.star_system.budget_thresholds
 
-        if self.kardashev_level >= 3:
-            total_energy_available = (
-                min(energy_budget['germination_planet_power'] +
-                energy_budget['planets_power'],energy_budget['star_energy_power']) +
-                energy_budget['star_energy_power']
-            )
-        elif self.kardashev_level == 2 :
-            total_energy_available = (
-                min(energy_budget['germination_planet_power'] +
-                energy_budget['planets_power'],energy_budget['star_energy_power'])
-            )
-        elif self.kardashev_level < 2:
-            total_energy_available = min(energy_budget['germination_planet_power'],energy_budget['star_energy_power'])
-        else:
-            total_energy_available = 1
+        total_energy_available = self.energy_budget()
 
         self.attack_energy = attack_energy
         self._calculate_growth_rate(total_energy_available)
-        self._calculate_extinction_risk(total_energy_available)
+        self._calculate_extinction_risk(total_energy_available, global_time)
         self._update_energy_consumption(total_energy_available)
         self.total_energy_available = total_energy_available
         self.prevKL=self.kardashev_level
@@ -164,6 +282,12 @@ class Civilization:
         if self.prevKL != self.kardashev_level:
             sys.stdout.write("\033[J")  # Clear everything below the current cursor position
             print(f"Civ {self.civ_id}-{self.group_id} reached level: {self.kardashev_level} on Year: {global_time} with energy: {self.energy_consumption}\n")
+        self.update_interactions(global_time,communications_list)
+
+    def update_interactions(self,global_time,communications_list):
+        """
+        Processes received communications and plans attacks once the energy state of the year is known.
+        """
         self.comms=self._comms_updates(global_time,communications_list)
         self.colonization_attack=self._attack_planner(global_time)
 
@@ -171,6 +295,8 @@ class Civilization:
         """
         Updates the awareness map based on received communications and generates messages for allies when updates occur.
         """
+        if self.intelligence_ledger is not None:
+            return self._ledger_updates(global_time, communications_list)
         communications = []  # List of new communications to be sent
         pre_awareness_map = {key: value.copy() for key, value in self.awareness_map.items()}  # Preserve the previous state of the awareness map
         
@@ -183,60 +309,165 @@ class Civilization:
                     communication['destinatary'] == self.star_system.index):
                     # Check if the awareness map needs to be updated
                     
-                    position = communication['Position']
-                    if ((self.awareness_map[position]['civilization_id'] != communication['target_id'] or
-                        self.awareness_map[position]['group_id'] != communication['target_group'] or
-                        (self.awareness_map[position]['known_energy'] != communication['target_energy'] and
-                         communication['target_energy'] != None )) and
-                         self.awareness_map[position]['time_stamp'] < communication['time_stamp']):
-                        #when time stam is newer and there is a unpdate on energy consumption or civilization Id, then:
-                        # Update awareness map
-                        self.awareness_map[position]['civilization_id'] = communication['target_id']
-                        self.awareness_map[position]['group_id'] = communication['target_group']
-                        self.awareness_map[position]["known_energy"] = communication['target_energy']
-                        self.awareness_map[position]["time_stamp"] = communication['time_stamp']
-                        
-                        if self.group_id != communication['target_group']:
-                            
-                            self.awareness_map[position]["relationship"] = "Enemy"
-                            
-                        if ( self.group_id == communication['target_group'] and self.civ_id != communication['target_id']):
-                            self.awareness_map[position]["relationship"] = "Ally"
-
-
-        for star_index_, data in self.awareness_map.items():
-            if data["relationship"] == "Ally":    
-                for star_index, current_data in self.awareness_map.items():
-                    prev_data = pre_awareness_map.get(star_index, {})
-
-                    fields_to_check = ["civilization_id", "group_id","known_energy"]
-
-                    # Compare only the relevant fields
-                    if any(current_data.get(field) != prev_data.get(field) for field in fields_to_check):
-                        outgoing_message={
-                            "destinatary": star_index_,  # Send to this ally star
-                            "Origin": self.star_system.index,  # Message reveals the message origin
-                            "Position": star_index, # Message reveals the target position
-                            "target_id": current_data.get("civilization_id"),  # Message reveals target civiization
-                            "target_group": current_data.get("group_id"), # Message reveals target civilization group
-                            "target_energy":current_data.get("Known_energy"), # Message reveals target energy consumption
-                            "time_stamp":current_data.get("time_stamp"), #time stamp to track updated intelligence.
-                            "mssg_distance": self.awareness_map[star_index_]["distance"],  # Distance to the ally star
-                            "mssg_arrival": int(global_time + self.awareness_map[star_index_]["distance"]),  # Arrival time
-                            "mssg_send_time": global_time,
-                        }
-                        communications.append(outgoing_message)
-                        
+                    self._apply_intelligence(communication['Position'], communication)
+
+        if self.civilization_groups is not None:
+            # Live group members whose stars this civilization already knows as allied
+            allies = sorted(member.star_system.index for member in self.civilization_groups.members(self.group_id)
+                            if member is not self and self.awareness_map.get(member.star_system.index, {}).get("relationship") == "Ally")
+        else:
+            allies = [star_index for star_index, data in self.awareness_map.items() if data["relationship"] == "Ally"]
+        if allies:
+            fields_to_check = ["civilization_id", "group_id","known_energy"]
+            ally_distances = [self.awareness_map[ally]["distance"] for ally in allies]  # Distance to each ally star
+            ally_arrivals = [int(global_time + distance) for distance in ally_distances]  # Arrival time at each ally star
+            for star_index, current_data in self.awareness_map.items():
+                prev_data = pre_awareness_map.get(star_index, {})
+
+                # Compare only the relevant fields
+                if any(current_data.get(field) != prev_data.get(field) for field in fields_to_check):
+                    # One group message per update, delivered to every ally star
+                    outgoing_message={
+                        "destinataries": allies,  # Send to these ally stars
+                        "Origin": self.star_system.index,  # Message reveals the message origin
+                        "Position": star_index, # Message reveals the target position
+                        "target_id": current_data.get("civilization_id"),  # Message reveals target civiization
+                        "target_group": current_data.get("group_id"), # Message reveals target civilization group
+                        "target_energy":current_data.get("Known_energy"), # Message reveals target energy consumption
+                        "time_stamp":current_data.get("time_stamp"), #time stamp to track updated intelligence.
+                        "mssg_distances": ally_distances,
+                        "mssg_arrivals": ally_arrivals,
+                        "mssg_send_time": global_time,
+                    }
+                    communications.append(outgoing_message)
+
         # Set communications to None if no messages were generated
         if not communications:
             communications = None
 
         return communications
 
+    def _apply_intelligence(self, position, intelligence):
+        """
+        Updates the awareness map entry of the star at `position` from a message or a ledger version,
+        when it is newer and changes the known civilization, group or energy.
+
+        Returns:
+        - bool: True if the entry was updated.
+        """
+        self._become_aware(position)  # Intelligence may reveal stars beyond the awareness horizon
+        if ((self.awareness_map[position]['civilization_id'] != intelligence['target_id'] or
+            self.awareness_map[position]['group_id'] != intelligence['target_group'] or
+            (self.awareness_map[position]['known_energy'] != intelligence['target_energy'] and
+             intelligence['target_energy'] != None )) and
+             self.awareness_map[position]['time_stamp'] < intelligence['time_stamp']):
+            #when time stam is newer and there is a unpdate on energy consumption or civilization Id, then:
+            # Update awareness map
+            self.awareness_map[position]['civilization_id'] = intelligence['target_id']
+            self.awareness_map[position]['group_id'] = intelligence['target_group']
+            self.awareness_map[position]["known_energy"] = intelligence['target_energy']
+            self.awareness_map[position]["time_stamp"] = intelligence['time_stamp']
+
+            if self.group_id != intelligence['target_group']:
+
+                self.awareness_map[position]["relationship"] = "Enemy"
+
+            if ( self.group_id == intelligence['target_group'] and self.civ_id != intelligence['target_id']):
+                self.awareness_map[position]["relationship"] = "Ally"
+            self._index_star(position)
+            return True
+        return False
+
+    def _ledger_updates(self, global_time, communications_list):
+        """
+        Ledger counterpart of the message exchange: applies the allied facts that became visible from this star,
+        then the communications received, publishing every observation that updated the awareness map.
+        Allies learn it from the ledger, so no message is generated.
+        """
+        self._apply_visible_facts(global_time)
+        for communication in communications_list or ():
+            if (communication['mssg_arrival'] == global_time and
+                communication['destinatary'] == self.star_system.index):
+                position = communication['Position']
+                if self._apply_intelligence(position, communication):
+                    data = self.awareness_map[position]
+                    self.intelligence_ledger.publish(self.group_id, position, {
+                        "target_id": data["civilization_id"],
+                        "target_group": data["group_id"],
+                        "target_energy": data["known_energy"],
+                        "time_stamp": data["time_stamp"],
+                    }, self.star_system.index, global_time)
+        return None
+
+    def _light_delay(self, star_index):
+        """
+        Returns the years light takes from the star at `star_index` to this civilization's star.
+        """
+        return int(self._star_distance(star_index))
+
+    def _collect_facts(self):
+        """
+        Reads the changes of the group ledger since the last read and schedules the year each changed fact
+        becomes visible from this star.
+        """
+        star_indexes, self._ledger_cursor = self.intelligence_ledger.changes(self.group_id, self._ledger_cursor)
+        for star_index in star_indexes:
+            self._schedule_fact(star_index)
+
+    def _schedule_fact(self, star_index, after=None):
+        """
+        Sets the visibility year of the fact about `star_index` to the earliest arrival of a version newer than
+        the awareness map entry (arriving after year `after`, if given), or clears it if there is none.
+        """
+        known = self.awareness_map.get(star_index)
+        time_stamp = known["time_stamp"] if known is not None else -1
+        arrivals = (version["published"] + self._light_delay(version["origin"])
+                    for version in self.intelligence_ledger.versions(self.group_id, star_index)
+                    if version["time_stamp"] > time_stamp)
+        visible = min((arrival for arrival in arrivals if after is None or arrival > after), default=None)
+        if visible is None:
+            self.fact_visibility.pop(star_index, None)
+        elif visible != self.fact_visibility.get(star_index):
+            self.fact_visibility[star_index] = visible
+            heapq.heappush(self._visibility_queue, (visible, star_index))
+            if len(self._visibility_queue) > (COMPACT_RATIO + 1) * len(self.fact_visibility):
+                # Rescheduled facts leave outdated entries behind
+                self._visibility_queue = [(year, index) for index, year in self.fact_visibility.items()]
+                heapq.heapify(self._visibility_queue)
+
+    def _apply_visible_facts(self, global_time):
+        """
+        Applies the newest version visible from this star of every fact whose visibility year has come.
+        """
+        self._collect_facts()
+        while self._visibility_queue and self._visibility_queue[0][0] <= global_time:
+            visible, star_index = heapq.heappop(self._visibility_queue)
+            if self.fact_visibility.get(star_index) != visible:
+                continue  # Rescheduled since it was queued
+            arrived = [version for version in self.intelligence_ledger.versions(self.group_id, star_index)
+                       if version["published"] + self._light_delay(version["origin"]) <= global_time]
+            if arrived:
+                self._apply_intelligence(star_index, max(arrived, key=lambda version: version["time_stamp"]))
+            self._schedule_fact(star_index, after=global_time)  # Newer versions may still be on their way
+
+    def next_fact_arrival(self):
+        """
+        Returns the earliest year in which an allied fact becomes visible from this star, or None.
+        Only meaningful with an intelligence ledger.
+        """
+        if self.intelligence_ledger is None:
+            return None
+        self._collect_facts()
+        while self._visibility_queue and self.fact_visibility.get(self._visibility_queue[0][1]) != self._visibility_queue[0][0]:
+            heapq.heappop(self._visibility_queue)
+        return self._visibility_queue[0][0] if self._visibility_queue else None
+
     def _attack_planner(self,global_time):
         """
         Plans an attack based on the current awareness map and Kardashev level.
         """
+        if self.threat_index is not None:
+            return self._indexed_attack_planner(global_time)
         colonization_attack=None
         max_danger=0
         target_star_index = None
@@ -246,17 +477,21 @@ class Civilization:
         
         if (max_danger==0 and self.energy_consumption > 2*self.limit_KL_3):
             min_distance = float('inf')
-            for star_index, star_data in self.awareness_map.items():
-                if star_data["relationship"] =="Enemy": # Relationships that must be target
-                    if star_data["distance"] < min_distance:
-                        min_distance = star_data["distance"]
-                        target_star_index = star_index
-                elif star_data["relationship"] ==None: #  Potential empty Star to colonize
-                    if star_data["distance"] < min_distance:
-                        min_distance = star_data["distance"]
-                        target_star_index = star_index
-                        self.awareness_map[target_star_index]["relationship"] = "Colonizing"
-                        self.awareness_map[target_star_index]["time_stamp"] = global_time
+            while True:
+                for star_index, star_data in self.awareness_map.items():
+                    if star_data["relationship"] =="Enemy": # Relationships that must be target
+                        if star_data["distance"] < min_distance:
+                            min_distance = star_data["distance"]
+                            target_star_index = star_index
+                    elif star_data["relationship"] ==None: #  Potential empty Star to colonize
+                        if star_data["distance"] < min_distance:
+                            min_distance = star_data["distance"]
+                            target_star_index = star_index
+                            self.awareness_map[target_star_index]["relationship"] = "Colonizing"
+                            self.awareness_map[target_star_index]["time_stamp"] = global_time
+                # Every known star is taken: look further away before giving up
+                if target_star_index is not None or not self._extend_awareness():
+                    break
         if max_danger>0 and self.energy_consumption>max_danger*10:
             for star_index, star_data in self.awareness_map.items():
                 if star_data["known_energy"] ==max_danger:
@@ -265,19 +500,50 @@ class Civilization:
 
         #print(f"Targeting star index {target_star_index} with minimum distance {min_distance}")
         if target_star_index is not None:
-            colonization_attack= {
-                "destinatary": target_star_index,
-                "Origin":self.star_system.index,
-                "Sender_id": self.civ_id,
-                "sender_group": self.group_id,
-                "attack_cost": self.energy_consumption*0.5,  # 50% of civilization energy
-                "attack_energy": self.energy_consumption*0.5*0.1,  # 10% of the attack is destrutive power
-                "attack_speed": 0.01,  # Arbritary 5% of light speed. The speed and the two energies could be dynamic between eachother.
-                "attack_distance": int(min_distance),
-                "attack_arrival": global_time+int(min_distance/0.01),  # Time the attack will arrive at 0.01 light speed
-                "attack_send_time": global_time,
-            }
+            colonization_attack=self._colonization_attack(global_time, target_star_index, min_distance)
         return colonization_attack
+
+    def _indexed_attack_planner(self, global_time):
+        """
+        Plans the same attacks as the awareness map scan from the threat index. Unlike the scan, only the
+        targeted star is marked as "Colonizing", not every nearer star met on the way to it.
+        """
+        target_star_index, max_danger = self.threat_index.strongest_enemy()
+        if max_danger > 0:
+            if self.energy_consumption <= max_danger*10:
+                return None
+        elif self.energy_consumption > 2*self.limit_KL_3:
+            while True:
+                target_star_index = self.threat_index.nearest_candidate()
+                # Every known star is taken: look further away before giving up
+                if target_star_index is not None or not self._extend_awareness():
+                    break
+            if target_star_index is None:
+                return None
+            if self.awareness_map[target_star_index]["relationship"] is None:
+                self.awareness_map[target_star_index]["relationship"] = "Colonizing"
+                self.awareness_map[target_star_index]["time_stamp"] = global_time
+                self._index_star(target_star_index)
+        else:
+            return None
+        return self._colonization_attack(global_time, target_star_index, self.awareness_map[target_star_index]["distance"])
+
+    def _colonization_attack(self, global_time, target_star_index, min_distance):
+        """
+        Returns the attack sent from this civilization's star to `target_star_index`, `min_distance` light years away.
+        """
+        return {
+            "destinatary": target_star_index,
+            "Origin":self.star_system.index,
+            "Sender_id": self.civ_id,
+            "sender_group": self.group_id,
+            "attack_cost": self.energy_consumption*0.5,  # 50% of civilization energy
+            "attack_energy": self.energy_consumption*0.5*0.1,  # 10% of the attack is destrutive power
+            "attack_speed": 0.01,  # Arbritary 5% of light speed. The speed and the two energies could be dynamic between eachother.
+            "attack_distance": int(min_distance),
+            "attack_arrival": global_time+int(min_distance/0.01),  # Time the attack will arrive at 0.01 light speed
+            "attack_send_time": global_time,
+        }
     def get_parameters(self):
         """
         Returns the current parameters of the civilization.
@@ -0,0 +1,107 @@
+import math
+import sys
+import numpy as np
+
+GROWTH_RATE = np.exp(0.0015) - 1  # Same geometric growth as Civilization._calculate_growth_rate
+
+class CivilizationTable:
+    def __init__(self, capacity=64, random_streams=None):
+        """
+        Struct-of-arrays state of all civilizations, indexed by civ_id, with a vectorized kernel that applies
+        the energy budget, growth, danger, extinction, attack and Kardashev rules of Civilization.update
+        to every live civilization at once.
+
+        Parameters:
+        - capacity (int): Initial number of rows; the table doubles when full.
+        - random_streams (RandomStreams): Random streams of the cosmos; in counter mode the extinction draws
+          of all civilizations are generated in one batch.
+        """
+        self.random_streams = random_streams
+        self.size = 0
+        self.energy_consumption = np.zeros(capacity)
+        self.kardashev_level = np.zeros(capacity, dtype=np.int8)
+
+    def add(self, civilization):
+        """
+        Adds the row of a new civilization. Rows are indexed by civ_id, which Cosmos assigns sequentially.
+        """
+        row = civilization.civ_id
+        if row >= len(self.energy_consumption):
+            capacity = max(2 * len(self.energy_consumption), row + 1)
+            self.energy_consumption = np.resize(self.energy_consumption, capacity)
+            self.kardashev_level = np.resize(self.kardashev_level, capacity)
+        self.energy_consumption[row] = civilization.energy_consumption
+        self.kardashev_level[row] = civilization.kardashev_level
+        self.size = max(self.size, row + 1)
+
+    def update(self, global_time, civilizations, attack_list):
+        """
+        Runs the yearly energy update of the given live civilizations and mirrors the results back
+        onto the Civilization objects.
+
+        Parameters:
+        - global_time (int): Current global time step.
+        - civilizations (list): Live civilizations to update, in update order.
+        - attack_list (dict): Attack energy received by each star system index this year.
+
+        Returns:
+        - list: Civilizations whose Kardashev level changed this year.
+        """
+        if not civilizations:
+            return []
+        rows = np.fromiter((civ.civ_id for civ in civilizations), dtype=np.intp, count=len(civilizations))
+        budgets = np.array([
+            star.budget_thresholds + star.budget_tiers + (star.SSb['danger'],)
+            for star in (civ.star_system for civ in civilizations)
+        ]).reshape(len(civilizations), 7)
+        limit_KL_2, limit_KL_3, limit_KL_4, low_tier, level_2_tier, high_tier, danger = budgets.T
+        attack_energy = np.array([attack_list[civ.star_system.index] for civ in civilizations], dtype=np.float64)
+        if self.random_streams is not None and self.random_streams.mode == "counter":
+            draws = self.random_streams.uniforms("civilization", rows, global_time, "extinction")
+            draws[[civ.forced_extinction for civ in civilizations]] = -1.0
+        else:
+            draws = np.array([-1.0 if civ.forced_extinction else civ.random_gen.random() for civ in civilizations])
+
+        energy = self.energy_consumption[rows]
+        level = self.kardashev_level[rows]
+
+        # Energy budget tier of the current level
+        total_energy_available = np.where(level >= 3, high_tier, np.where(level == 2, level_2_tier, low_tier))
+        capped_budget = np.where(total_energy_available > 1, total_energy_available, 1)
+        growth_rate = np.where(energy <= total_energy_available, GROWTH_RATE, 1)
+
+        # Extinction events are rare, so only the triggered rows draw their magnitude
+        scarcity_factor = np.maximum(0, energy / capped_budget)
+        extinction_risk_probability = 1e-8 * scarcity_factor
+        extinction_risk = np.zeros(len(civilizations))
+        for i in np.flatnonzero(draws < extinction_risk_probability):
+            # After the extinction check draw, which forced extinctions skip like the scalar update does
+            random_gen = civilizations[i].random_gen.at(global_time, "extinction", offset=0 if civilizations[i].forced_extinction else 1)
+            extinction_risk[i] = total_energy_available[i] * math.exp(-0.5*((((1 - abs(random_gen.gauss(0, (scarcity_factor[i] +1) / 3))) - 0)/( 1 / 9)) ** 2))
+
+        # Growth, danger and extinction, then the attack energy received or paid
+        energy = energy + energy * growth_rate + danger - extinction_risk
+        energy = np.where(attack_energy > 0, np.maximum(0, np.minimum(energy, capped_budget)) + attack_energy, energy)
+        energy = np.where(attack_energy < 0, energy + attack_energy, energy)
+        energy = np.maximum(0, np.minimum(energy, capped_budget))
+
+        new_level = np.select(
+            [energy >= limit_KL_4, energy >= limit_KL_3, energy >= limit_KL_2, energy > 0],
+            [4, 3, 2, 1], 0).astype(np.int8)
+        self.energy_consumption[rows] = energy
+        self.kardashev_level[rows] = new_level
+
+        for civ, values in zip(civilizations, zip(
+                energy.tolist(), new_level.tolist(), level.tolist(), growth_rate.tolist(), extinction_risk.tolist(),
+                extinction_risk_probability.tolist(), total_energy_available.tolist(), attack_energy.tolist(),
+                limit_KL_2.tolist(), limit_KL_3.tolist(), limit_KL_4.tolist())):
+            civ.forced_extinction = False
+            (civ.energy_consumption, civ.kardashev_level, civ.prevKL, civ.growth_rate, civ.extinction_risk,
+             civ.extinction_risk_probability, civ.total_energy_available, civ.attack_energy,
+             civ.limit_KL_2, civ.limit_KL_3, civ.limit_KL_4) = values
+
+        level_changes = [civilizations[i] for i in np.flatnonzero(new_level != level)]
+        for civ in level_changes:
+            sys.stdout.write("\033[J")  # Clear everything below the current cursor position
+            print(f"Civ {civ.civ_id}-{civ.group_id} reached level: {civ.kardashev_level} on Year: {global_time} with energy: {civ.energy_consumption}\n")
+        return level_changes
@@ -0,0 +1,335 @@
+import contextlib
+import itertools
+import os
+import sys
+import traceback
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+from Civilization_Module import Civilization
+from Star_Catalog_Module import StarCatalog, attach_shared_memory
+from Random_Streams_Module import RandomStreams
+from Memory_Accounting_Module import deep_sizeof
+
+# Columns of the shared civilization state, one row per civ_id. The cosmos writes the inputs of the year,
+# the worker owning the civilization writes the outputs.
+INPUT_COLUMNS = ("attack_energy", "danger", "limit_KL_2", "limit_KL_3", "limit_KL_4", "low_tier", "level_2_tier", "high_tier")
+OUTPUT_COLUMNS = ("energy_consumption", "kardashev_level", "prevKL", "growth_rate", "extinction_risk",
+                  "extinction_risk_probability", "total_energy_available")
+COLUMNS = INPUT_COLUMNS + OUTPUT_COLUMNS
+COLUMN = {name: column for column, name in enumerate(COLUMNS)}
+AWARENESS_SAMPLE_SIZE = 16  # Awareness map entries each worker sizes for the memory accounting
+AWARENESS_SAMPLE_INTERVAL = 100  # Years between two sizings of the sample; entry counts are reported every year
+
+
+class _SharedState:
+    """
+    Worker-side mapping of the shared civilization state block, replaced when the cosmos grows it.
+    """
+    def __init__(self):
+        self.block = None
+        self.array = None
+
+    def attach(self, name, capacity):
+        if self.block is not None:
+            self.array = None
+            self.block.close()
+        self.block = attach_shared_memory(name)
+        self.array = np.ndarray((capacity, len(COLUMNS)), dtype=np.float64, buffer=self.block.buf)
+
+
+class _StarView:
+    """
+    Worker-side stand-in for the StarSystem of a civilization: its index and position, and the budget tables
+    and danger of the year read from the civilization's row of the shared state.
+    """
+    def __init__(self, index, position, shared, row):
+        self.index = index
+        self.position = position
+        self._shared = shared
+        self._row = row
+
+    @property
+    def budget_thresholds(self):
+        return tuple(self._shared.array[self._row, COLUMN["limit_KL_2"]:COLUMN["limit_KL_4"] + 1].tolist())
+
+    @property
+    def budget_tiers(self):
+        return tuple(self._shared.array[self._row, COLUMN["low_tier"]:COLUMN["high_tier"] + 1].tolist())
+
+    def get_parameters(self):
+        return {"danger": float(self._shared.array[self._row, COLUMN["danger"]])}
+
+
+class _RemoteMember:
+    """
+    Group member owned by another worker, as seen by the ally lookup of Civilization._comms_updates.
+    """
+    def __init__(self, civ_id, star_index):
+        self.civ_id = civ_id
+        self.star_system = _StarRef(star_index)
+
+
+class _StarRef:
+    def __init__(self, index):
+        self.index = index
+
+
+class _GroupDirectory:
+    """
+    Worker-side copy of the live group membership, with the local civilizations as themselves.
+    """
+    def __init__(self):
+        self._members = {}  # {group_id: {civ_id: member}} in joining order
+
+    def add(self, group_id, member):
+        self._members.setdefault(group_id, {})[member.civ_id] = member
+
+    def remove(self, group_id, civ_id):
+        self._members.get(group_id, {}).pop(civ_id, None)
+
+    def members(self, group_id):
+        return list(self._members.get(group_id, {}).values())
+
+
+def _open_catalog(catalog_handle):
+    if catalog_handle["kind"] == "procedural":
+        return StarCatalog(catalog_handle["seed"], catalog_handle["num_star_systems"], catalog_handle["stars_density"])
+    return StarCatalog.attach(catalog_handle["handle"])
+
+def _worker_main(connection, catalog_handle, seed, rng, awareness_radius, attack_planner):
+    """
+    Worker process: owns the Civilization objects of its partition and updates them on every "step" request.
+    Replies to a step with {"actions": {civ_id: (colonization_attack, comms)} for the civilizations that launched
+    an attack or sent messages, "awareness": (entries, bytes of the sampled entries, sampled entries) of the
+    awareness maps of the partition, the sample being sized every AWARENESS_SAMPLE_INTERVAL years}, or with
+    ("error", traceback).
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # The cosmos prints the level changes, in civilization order
+        star_map = _open_catalog(catalog_handle)
+        random_streams = RandomStreams(seed, mode=rng)
+        shared = _SharedState()
+        directory = _GroupDirectory()
+        civilizations = {}  # {civ_id: Civilization} owned by this worker
+        awareness_sample, next_sample_year = (0, 0), None  # (bytes, entries) of the latest sized sample
+        while True:
+            request = connection.recv()
+            try:
+                if request["op"] == "close":
+                    break
+                if request["op"] == "awareness":
+                    connection.send({civ_id: civ.awareness_map for civ_id, civ in civilizations.items()})
+                    continue
+                if request["state"] is not None:
+                    shared.attach(*request["state"])
+                for civ_id, group_id in request["retired"]:
+                    civilizations.pop(civ_id, None)
+                    directory.remove(group_id, civ_id)
+                for civ_id, civ_seed, star_index, group_id, known_stars in request["adopted"]:
+                    star_view = _StarView(star_index, star_map[star_index]["position"], shared, civ_id)
+                    civilization = Civilization(seed=civ_seed, star_system=star_view, civ_id=civ_id, group_id=group_id,
+                                                star_map=star_map, civilization_groups=directory, awareness_radius=awareness_radius,
+                                                random_gen=random_streams.stream("civilization", civ_id, civ_seed),
+                                                attack_planner=attack_planner, known_stars=known_stars)
+                    civilization.index = civ_id
+                    civilizations[civ_id] = civilization
+                for civ_id, star_index, group_id in request["joined"]:
+                    directory.add(group_id, civilizations.get(civ_id) or _RemoteMember(civ_id, star_index))
+
+                global_time, comms, array = request["global_time"], request["comms"], shared.array
+                results = {}
+                entries, sample = 0, []
+                resample = next_sample_year is None or global_time >= next_sample_year or not awareness_sample[1]
+                for civ_id in sorted(civilizations):
+                    civ = civilizations[civ_id]
+                    civ.update(global_time, attack_energy=float(array[civ_id, COLUMN["attack_energy"]]),
+                               communications_list=comms.get(civ_id, []))
+                    array[civ_id, COLUMN["energy_consumption"]:] = (
+                        civ.energy_consumption, civ.kardashev_level, civ.prevKL, civ.growth_rate, civ.extinction_risk,
+                        civ.extinction_risk_probability, civ.total_energy_available)
+                    if civ.colonization_attack is not None or civ.comms is not None:
+                        results[civ_id] = (civ.colonization_attack, civ.comms)
+                    entries += len(civ.awareness_map)
+                    if resample:
+                        sample.extend(itertools.islice(civ.awareness_map.values(), AWARENESS_SAMPLE_SIZE - len(sample)))
+                if resample:
+                    awareness_sample = (sum(deep_sizeof(entry) for entry in sample), len(sample))
+                    next_sample_year = global_time + AWARENESS_SAMPLE_INTERVAL
+                connection.send({"actions": results, "awareness": (entries,) + awareness_sample})
+            except Exception:
+                connection.send(("error", traceback.format_exc()))
+        connection.close()
+        if shared.block is not None:
+            shared.array = None
+            shared.block.close()
+        star_map.close()
+
+
+class CivilizationWorkerPool:
+    def __init__(self, star_map, seed, rng="legacy", awareness_radius=None, num_workers=None, capacity=64, attack_planner="scan"):
+        """
+        Persistent worker processes running the yearly Civilization.update of the live civilizations,
+        partitioned by civ_id. Each worker owns the full Civilization objects of its partition; the cosmos
+        shares their per-year inputs (attack energy, danger, budget tables) and reads back their energy
+        state through one shared memory array, and only attacks and messages travel back through pipes.
+
+        Parameters:
+        - star_map (StarCatalog): Catalog of the cosmos; array catalogs are shared with the workers.
+        - seed (int): Seed of the cosmos, for the civilizations' random streams.
+        - rng (str): Random stream mode of the cosmos, "legacy" or "counter".
+        - awareness_radius (float): Awareness radius of the cosmos.
+        - num_workers (int): Number of worker processes (defaults to the number of CPUs).
+        - capacity (int): Initial rows of the shared state; the block doubles when full.
+        - attack_planner (str): Attack planner of the civilizations, "scan" or "indexed".
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self._catalog = None
+        self._procedural = star_map.positions is None
+        if self._procedural:
+            catalog_handle = {"kind": "procedural", "seed": star_map.seed, "num_star_systems": star_map.num_star_systems,
+                              "stars_density": star_map.stars_density}
+        else:
+            # Publish a copy, so a catalog already attached from shared memory keeps its own block
+            self._catalog = StarCatalog(star_map.seed, star_map.num_star_systems, star_map.stars_density)
+            self._catalog._set_arrays(star_map.positions, star_map.type_codes, star_map.seeds, distances=star_map.distances)
+            catalog_handle = {"kind": "arrays", "handle": self._catalog.publish()}
+        self._block = None
+        self.state = None
+        self._allocate(capacity)
+        self._state_changed = True
+        self._owned = {}  # {civ_id: group_id} of the civilizations living in the workers
+        self.awareness_stats = (0, 0, 0)  # (entries, bytes of the sampled entries, sampled entries) of the awareness maps in the workers
+        context = multiprocessing.get_context()
+        self._connections, self._processes = [], []
+        for _ in range(self.num_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_worker_main, args=(worker_connection, catalog_handle, seed, rng, awareness_radius, attack_planner),
+                                      daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def _allocate(self, capacity):
+        """
+        Creates a shared state block of `capacity` rows, copying the current rows over.
+        Returns the previous block, which must stay alive until the workers attached the new one.
+        """
+        block = shared_memory.SharedMemory(create=True, size=capacity * len(COLUMNS) * 8)
+        state = np.ndarray((capacity, len(COLUMNS)), dtype=np.float64, buffer=block.buf)
+        state[...] = 0
+        if self.state is not None:
+            state[:len(self.state)] = self.state
+        previous = self._block
+        self._block, self.state = block, state
+        self._state_changed = True
+        return previous
+
+    def update(self, global_time, civilizations, attack_list, comms_received_list):
+        """
+        Runs the yearly update of the given live civilizations in the workers and mirrors the results back
+        onto the Civilization objects, in civ_id order.
+
+        Parameters:
+        - global_time (int): Current global time step.
+        - civilizations (list): Live civilizations, in civ_id order.
+        - attack_list (dict): Attack energy received by each star system index this year.
+        - comms_received_list (dict): Communications received by each star system index this year.
+        """
+        live_ids = {civ.civ_id for civ in civilizations}
+        retired = [(civ_id, group_id) for civ_id, group_id in self._owned.items() if civ_id not in live_ids]
+        for civ_id, _ in retired:
+            del self._owned[civ_id]
+        joined = [civ for civ in civilizations if civ.civ_id not in self._owned]
+        previous_block = None
+        if civilizations and civilizations[-1].civ_id >= len(self.state):
+            previous_block = self._allocate(max(2 * len(self.state), civilizations[-1].civ_id + 1))
+
+        state = self.state
+        for civ in civilizations:
+            state[civ.civ_id, :len(INPUT_COLUMNS)] = ((attack_list[civ.star_system.index], civ.star_system.SSb['danger'])
+                                                      + civ.star_system.budget_thresholds + civ.star_system.budget_tiers)
+        requests = [{"op": "step", "global_time": global_time, "retired": retired, "adopted": [], "comms": {},
+                     "joined": [(civ.civ_id, civ.star_system.index, civ.group_id) for civ in joined],
+                     "state": (self._block.name, len(self.state)) if self._state_changed else None}
+                    for _ in range(self.num_workers)]
+        for civ in joined:
+            self._owned[civ.civ_id] = civ.group_id
+            # Civilizations of procedural catalogs are adopted in the year they are born, still knowing only their birth stars
+            known_stars = list(civ.awareness_map) if self._procedural else None
+            requests[civ.civ_id % self.num_workers]["adopted"].append((civ.civ_id, civ.seed, civ.star_system.index, civ.group_id, known_stars))
+        for civ in civilizations:
+            received = comms_received_list[civ.star_system.index]
+            if received:
+                requests[civ.civ_id % self.num_workers]["comms"][civ.civ_id] = received
+        for connection, request in zip(self._connections, requests):
+            connection.send(request)
+        results = {}
+        awareness_stats = [0, 0, 0]
+        for connection in self._connections:
+            reply = self._receive(connection)
+            results.update(reply["actions"])
+            awareness_stats = [total + part for total, part in zip(awareness_stats, reply["awareness"])]
+        self.awareness_stats = tuple(awareness_stats)
+        self._state_changed = False
+        if previous_block is not None:
+            previous_block.close()
+            previous_block.unlink()
+
+        for civ in civilizations:
+            row = state[civ.civ_id].tolist()
+            civ.attack_energy = row[COLUMN["attack_energy"]]
+            civ.limit_KL_2, civ.limit_KL_3, civ.limit_KL_4 = civ.star_system.budget_thresholds
+            civ.energy_consumption = row[COLUMN["energy_consumption"]]
+            civ.kardashev_level = int(row[COLUMN["kardashev_level"]])
+            civ.prevKL = int(row[COLUMN["prevKL"]])
+            civ.growth_rate = row[COLUMN["growth_rate"]]
+            civ.extinction_risk = row[COLUMN["extinction_risk"]]
+            civ.extinction_risk_probability = row[COLUMN["extinction_risk_probability"]]
+            civ.total_energy_available = row[COLUMN["total_energy_available"]]
+            civ.colonization_attack, civ.comms = results.get(civ.civ_id, (None, None))
+            if civ.prevKL != civ.kardashev_level:
+                sys.stdout.write("\033[J")  # Clear everything below the current cursor position
+                print(f"Civ {civ.civ_id}-{civ.group_id} reached level: {civ.kardashev_level} on Year: {global_time} with energy: {civ.energy_consumption}\n")
+
+    def _receive(self, connection):
+        reply = connection.recv()
+        if isinstance(reply, tuple) and reply[0] == "error":
+            raise RuntimeError(f"Civilization worker failed:\n{reply[1]}")
+        return reply
+
+    def awareness_maps(self):
+        """
+        Returns {civ_id: awareness map} of every civilization living in the workers.
+        """
+        for connection in self._connections:
+            connection.send({"op": "awareness"})
+        maps = {}
+        for connection in self._connections:
+            maps.update(self._receive(connection))
+        return maps
+
+    def close(self):
+        """
+        Stops the workers and releases the shared memory.
+        """
+        for connection in self._connections:
+            try:
+                connection.send({"op": "close"})
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        self._connections, self._processes = [], []
+        if self._block is not None:
+            self.state = None
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+        if self._catalog is not None:
+            self._catalog.unlink()
+            self._catalog = None
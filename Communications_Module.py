@@ -0,0 +1,102 @@
+import heapq
+
+def is_multicast(message):
+    """
+    Returns True for group messages, which hold one payload and a list of recipient stars.
+    """
+    return "destinataries" in message
+
+def expand_message(message):
+    """
+    Yields the per-recipient view of a message, in the unicast message format.
+    Unicast messages are yielded unchanged.
+    """
+    if not is_multicast(message):
+        yield message
+        return
+    for recipient in range(len(message["destinataries"])):
+        yield _recipient_view(message, recipient)
+
+def _recipient_view(message, recipient):
+    """
+    Builds the unicast view of a multicast message for its `recipient`-th destinatary.
+    """
+    return {
+        "destinatary": message["destinataries"][recipient],
+        "Origin": message["Origin"],
+        "Position": message["Position"],
+        "target_id": message["target_id"],
+        "target_group": message["target_group"],
+        "target_energy": message["target_energy"],
+        "time_stamp": message["time_stamp"],
+        "mssg_distance": message["mssg_distances"][recipient],
+        "mssg_arrival": message["mssg_arrivals"][recipient],
+        "mssg_send_time": message["mssg_send_time"],
+    }
+
+class CommsInbox:
+    def __init__(self):
+        """
+        Indexes pending message deliveries by arrival year and destinatary star.
+        Multicast payloads are stored once; the per-recipient views are only built on delivery.
+        """
+        self._deliveries = {}  # {arrival: {destinatary: [(message, recipient), ...]}}
+        self._arrivals = []  # Min-heap of the arrival years present in _deliveries
+
+    def post(self, message):
+        """
+        Registers every delivery of a unicast or multicast message.
+        """
+        if is_multicast(message):
+            for recipient, (destinatary, arrival) in enumerate(zip(message["destinataries"], message["mssg_arrivals"])):
+                self._add(arrival, destinatary, (message, recipient))
+        else:
+            self._add(message["mssg_arrival"], message["destinatary"], (message, None))
+
+    def _add(self, arrival, destinatary, delivery):
+        by_destinatary = self._deliveries.get(arrival)
+        if by_destinatary is None:
+            by_destinatary = self._deliveries[arrival] = {}
+            heapq.heappush(self._arrivals, arrival)
+        by_destinatary.setdefault(destinatary, []).append(delivery)
+
+    def deliver(self, global_time, destinatary):
+        """
+        Removes and returns the messages arriving at `destinatary` on `global_time`, in posting order.
+        """
+        deliveries = self._deliveries.get(global_time, {}).pop(destinatary, [])
+        return [message if recipient is None else _recipient_view(message, recipient)
+                for message, recipient in deliveries]
+
+    def discard_until(self, global_time):
+        """
+        Drops deliveries due on or before `global_time` that nobody collected.
+        """
+        while self._arrivals and self._arrivals[0] <= global_time:
+            del self._deliveries[heapq.heappop(self._arrivals)]
+
+    def next_arrival(self):
+        """
+        Returns the earliest pending arrival year, or None if no message is in flight.
+        """
+        return self._arrivals[0] if self._arrivals else None
+
+    def in_flight(self, global_time):
+        """
+        Yields the unicast view of every pending delivery arriving after `global_time`.
+        """
+        for arrival, by_destinatary in self._deliveries.items():
+            if arrival > global_time:
+                for deliveries in by_destinatary.values():
+                    for message, recipient in deliveries:
+                        yield message if recipient is None else _recipient_view(message, recipient)
+
+    def __iter__(self):
+        """
+        Iterates the pending (message, recipient) deliveries; recipient is None for unicast messages.
+        """
+        return (delivery for by_destinatary in self._deliveries.values()
+                for deliveries in by_destinatary.values() for delivery in deliveries)
+
+    def __len__(self):
+        return sum(len(deliveries) for by_destinatary in self._deliveries.values() for deliveries in by_destinatary.values())
@@ -1,60 +1,144 @@
 import random
 from Star_System_Module import StarSystem
 from Civilization_Module import Civilization
+from Star_Catalog_Module import StarCatalog, MaterializedStarSystems
+from Communications_Module import CommsInbox, expand_message
+from Civilization_Groups_Module import CivilizationGroups
+from Civilization_Table_Module import CivilizationTable
+from Event_Driver_Module import EventDrivenDriver
+from Random_Streams_Module import RandomStreams
+from Memory_Accounting_Module import MemoryMonitor
+from Intelligence_Ledger_Module import IntelligenceLedger, INTELLIGENCE_MODES
+from Civilization_Workers_Module import CivilizationWorkerPool
+from Threat_Index_Module import ATTACK_PLANNERS
 from vpython import sphere, vector, color, arrow, canvas,helix,rate
 import math
+import itertools
+import json
+import numpy as np
 import sys
 import time
 import threading
-from flask_app import app, simulation_data  # Import the Flask app and shared data
+from Galaxy_Stream_Module import STAR_STATE, FLIGHT, FLIGHT_ATTACK, FLIGHT_MESSAGE, EMPTY_STAR_COLOR, group_color, encode_frame
+from flask_app import app, snapshots, galaxy_stream  # Import the Flask app, shared snapshots and WebGL galaxy feed
 
 class Cosmos:
-    star_map = {} # Global star map: {index: {"position": position, "type": star_type, "seed": star_seed}}
-    def __init__(self, seed, num_star_systems):
+    def __init__(self, seed, num_star_systems, lazy_stars=False, star_catalog=None, engine="scalar", awareness_radius=None, rng="legacy", event_store=None, star_cycle="static", intelligence="messages", num_workers=None, attack_planner="scan", germination_seeds=(7, 5), star_distances=False):
         """
         Initializes the Cosmos with a deterministic seed and a number of star systems and civilizations.
 
         Parameters:
         - seed (int): Seed for deterministic random number generation.
         - num_star_systems (int): Number of star systems to create.
+        - lazy_stars (bool): Derive stars procedurally from (seed, index) and only materialize the ones touched
+          by civilizations, events or queries, instead of building every StarSystem up front. Civilizations
+          know the materialized stars and survey the catalog in batches as they run out of targets, and
+          germination only fires on materialized stars, so lazy runs do not follow the trajectory of the
+          eager galaxy with the same seed.
+        - star_catalog (StarCatalog): Optional prebuilt catalog, e.g. one attached from shared memory by a worker,
+          used instead of generating the stars again.
+        - engine (str): "scalar" updates each civilization object in turn; "numpy" runs the yearly energy
+          update of all civilizations at once on a CivilizationTable; "workers" runs the civilization updates
+          in a pool of worker processes (call close() once done with the cosmos).
+        - awareness_radius (float): Optional radius in light years of the initial awareness horizon of each
+          civilization, taken from a neighbourhood query on the star catalog. None makes every civilization
+          aware of the whole galaxy. Requires an array catalog: lazy galaxies cannot answer neighbourhood
+          queries without deriving every star.
+        - rng (str): "legacy" keeps the sequential random.Random stream of every star and civilization;
+          "counter" keys every draw by (seed, entity, year, purpose) with a Philox counter-based generator,
+          so results no longer depend on the order or batching of the draws.
+        - event_store (EventStore): Optional store that persists births, level changes, attacks, colonizations,
+          deaths and messages for post-run queries.
+        - star_cycle (str): "static" keeps the power of every star constant; "dynamic" modulates it along
+          the star cycle from a precomputed phase table.
+        - intelligence (str): "messages" makes every civilization relay the updates of its awareness map to its
+          allies in group messages; "ledger" keeps one versioned IntelligenceLedger per group, whose facts each
+          member sees once light from the publishing star reaches it. Members still apply the visible facts to
+          their own awareness maps, so the ledger saves messages and relays, not awareness map memory.
+        - num_workers (int): Worker processes of the "workers" engine (defaults to the number of CPUs).
+        - attack_planner (str): "scan" makes every civilization scan its whole awareness map for targets every
+          year; "indexed" reads them from a per-civilization ThreatIndex updated as the awareness map changes,
+          and only marks the targeted star as being colonized.
+        - germination_seeds (list): Indexes of the stars forced to germinate a civilization on Year 1.
+        - star_distances (bool): Precompute the pairwise distance matrix of the star catalog, n² float64 values
+          shared with the workers, and read the distances of the civilizations from it instead of calculating
+          them. Matrix distances can differ from calculated ones in the last bit, so trajectories may differ
+          slightly. Requires an array catalog.
         """
+        if intelligence not in INTELLIGENCE_MODES:
+            raise ValueError(f"Unknown intelligence mode {intelligence}")
+        if engine == "workers" and intelligence == "ledger":
+            raise ValueError("The workers engine does not support the intelligence ledger")
+        if attack_planner not in ATTACK_PLANNERS:
+            raise ValueError(f"Unknown attack planner {attack_planner}")
+        if star_distances and lazy_stars:
+            raise ValueError("star_distances needs an array star catalog, not lazy_stars")
         self.seed = seed
         self.random_gen = random.Random(seed)
+        self.random_streams = RandomStreams(seed, mode=rng)  # Random streams of the stars and civilizations
         self.num_star_systems = num_star_systems
+        self.lazy_stars = lazy_stars
         self.stars_density=0.0008 # Solay system region ~0.004 stars with habitable planets per cubic light year
+        self.star_distances = star_distances
+        self.germination_seeds = list(germination_seeds)  # Stars forced to germinate on Year 1
+        self.star_map = star_catalog # Read-only star catalog: {index: {"position": position, "type": star_type, "seed": star_seed}}
         self.star_systems = []
         self.civilizations = []
-        self.civilization_groups = {}  # Groups of civilizations by origin
+        self.civilization_groups = CivilizationGroups()  # Live members of each group of civilizations by origin
         self.colonization_list = []  # List of ongoing colonizations
         self.communications_list = []  # List of ongoing comms
+        self.comms_inbox = CommsInbox()  # Pending comms deliveries by arrival year and star
+        self.engine = engine
+        self.event_store = event_store
+        self.event_hooks = []  # Callables hook(kind, year, fields) called for every recorded event
+        self.step_hooks = []  # Callables hook(cosmos, global_time) called at the end of every update
+        self.memory_monitor = None  # MemoryMonitor attached to this cosmos, if any
+        self.dashboard_detail = True  # False publishes dashboard snapshots without awareness lists and settled messages
+        self.colonizations_spilled = 0  # Settled colonizations removed from colonization_list by spill_history
+        self.communications_spilled = 0  # Delivered communications removed from communications_list
+        self.awareness_radius = awareness_radius
+        self.star_cycle = star_cycle
+        self.attack_planner = attack_planner
+        self.global_time = -1  # Last simulated year (-1 before the first step)
+        self.snapshots = snapshots  # Versioned dashboard snapshots published by display_data
+        self.galaxy_stream = galaxy_stream  # Binary feed of the WebGL galaxy view published by display_data
+        self._galaxy_positions_published = False
+        self._galaxy_view = {}  # {star_index: position in the WebGL galaxy view} of lazy galaxies
+        self._attacks_in_flight = []  # Colonizations of colonization_list still in flight at the last galaxy frame
+        self._colonizations_framed = 0  # Colonizations appended to colonization_list before the last galaxy frame
+        self.civilization_table = CivilizationTable(random_streams=self.random_streams) if engine == "numpy" else None
+        self.num_workers = num_workers
+        self.worker_pool = None  # CivilizationWorkerPool of the "workers" engine, started by the first update
         self._create_star_systems()
+        if awareness_radius is not None and self.star_map.positions is None:
+            raise ValueError("awareness_radius needs an array star catalog, not lazy_stars")
+        self.intelligence_ledger = (IntelligenceLedger(max_delay=self.star_map.length_simulation * 3 ** 0.5)
+                                    if intelligence == "ledger" else None)  # Shared allied knowledge of every group
 
 
     def _create_star_systems(self):
         """
-        Creates star systems and assigns each a random position.
-        """
-        star_types = ['G-type', 'K-type', 'M-type','F-type','A-type','B-type','O-type']
-        for i in range(self.num_star_systems):
-            # Create Star System
-            star_seed = self.random_gen.randint(0, int(1e9))
-            star_type = self.random_gen.choice(star_types)
-            star_system = StarSystem(seed=star_seed, star_type=star_type)
-            star_system.index = i  # Assign an index to the star system
-            star_system.type = star_type  # Store star type
-            
-
-            # Assign a random position in 3D space
-            Volume_simulation=self.num_star_systems/self.stars_density
-            Length_simulation=Volume_simulation**(1/3)
-            position = (
-                self.random_gen.uniform(-Length_simulation/2, Length_simulation/2),  # X-axis position
-                self.random_gen.uniform(-Length_simulation/2, Length_simulation/2),  # Y-axis position
-                self.random_gen.uniform(-Length_simulation/2, Length_simulation/2)   # Z-axis position
-            )
-            star_system.position = position
-            Cosmos.star_map[i] = {"position": position, "type": star_type, "seed": star_seed}
-            self.star_systems.append(star_system)
+        Creates the star catalog and the star systems. Eager galaxies draw every star from the cosmos generator
+        and build all StarSystem objects; lazy galaxies only materialize the germination seeds up front.
+        """
+        if self.star_map is not None:
+            if self.star_map.random_state is not None:
+                self.random_gen.setstate(self.star_map.random_state)  # Continue as if the stars had been drawn here
+            if self.star_distances:
+                self.star_map = self.star_map.to_arrays(with_distances=True)
+        elif self.lazy_stars:
+            self.star_map = StarCatalog(self.seed, self.num_star_systems, self.stars_density)
+        else:
+            self.star_map = StarCatalog.from_random(self.random_gen, self.num_star_systems, self.stars_density,
+                                                    with_distances=self.star_distances)
+
+        if self.lazy_stars:
+            self.star_systems = MaterializedStarSystems(self.star_map, self.random_streams, self.star_cycle)
+            for star_index in self.germination_seeds:
+                if star_index in self.star_map:
+                    self.star_systems[star_index]
+        else:
+            self.star_systems = [self.star_map.materialize(i, self.random_streams, self.star_cycle) for i in range(len(self.star_map))]
     def germination_events(self):
         """
         Monitors the danger parameter of each star system and initiates civilizations
@@ -62,7 +146,7 @@ class Cosmos:
         """
         for star_system in self.star_systems:
             params = star_system.get_parameters()
-            if star_system.index in [7,5] and global_time == 1:
+            if star_system.index in self.germination_seeds and self.global_time == 1:
                 params['danger'] = 10e-5
             if params['danger'] > 0:  # Germination event detected
                 # Check if a civilization already exists in this star system
@@ -72,14 +156,34 @@ class Cosmos:
                     civ_seed = self.random_gen.randint(0, int(1e9))
                     civ_id=len(self.civilizations) # Assign a unique index
 
-                    group_id = len(self.civilization_groups) # Assign a new group index
-                    new_civilization = Civilization(seed=civ_seed, star_system=star_system,civ_id=civ_id,group_id=group_id,star_map=Cosmos.star_map)
+                    group_id = self.civilization_groups.new_group_id() # Assign a new group index
+                    new_civilization = Civilization(seed=civ_seed, star_system=star_system,civ_id=civ_id,group_id=group_id,star_map=self.star_map,civilization_groups=self.civilization_groups,awareness_radius=self.awareness_radius,
+                                                  random_gen=self.random_streams.stream("civilization", civ_id, civ_seed),intelligence_ledger=self.intelligence_ledger,
+                                                  attack_planner=self.attack_planner,known_stars=self._known_stars())
                     new_civilization.index = civ_id  
-                    self.civilization_groups[group_id] = [new_civilization]
                     new_civilization.group_id = group_id
                     sys.stdout.write("\033[J")  # Clear everything below the current cursor position
-                    print("Created civilization:" + str(new_civilization.index)+"-"+str(new_civilization.group_id)+". On Year: "+str(global_time)+". On Star: "+str(star_system.index)+"\n")
-                    self.civilizations.append(new_civilization)
+                    print("Created civilization:" + str(new_civilization.index)+"-"+str(new_civilization.group_id)+". On Year: "+str(self.global_time)+". On Star: "+str(star_system.index)+"\n")
+                    self._register_civilization(new_civilization)
+                    self.record_event("birth", star_index=star_system.index, civ_id=civ_id, group_id=group_id)
+
+    def _known_stars(self):
+        """
+        Returns the indexes of the stars a civilization knows from birth on a procedural catalog: the materialized
+        ones. Array catalogs return None, as their civilizations know every star or their awareness horizon.
+        """
+        if self.star_map.positions is not None:
+            return None
+        return [star_system.index for star_system in self.star_systems]
+
+    def _register_civilization(self, civilization):
+        """
+        Adds a newly created civilization to the civilization list, its group and the civilization table.
+        """
+        self.civilizations.append(civilization)
+        self.civilization_groups.add(civilization)
+        if self.civilization_table is not None:
+            self.civilization_table.add(civilization)
 
     def monitor_civilization_energy(self):
         """
@@ -91,7 +195,9 @@ class Cosmos:
                 params = civilization.get_parameters()
                 if params['energy_consumption'] <= 0:
                     sys.stdout.write("\033[J")  # Clear everything below the current cursor position
-                    print(f"Civilization {civilization.index} in Star System {civilization.star_system.index} has died on Year: {global_time}\n")
+                    print(f"Civilization {civilization.index} in Star System {civilization.star_system.index} has died on Year: {self.global_time}\n")
+                    self.civilization_groups.remove(civilization)
+                    self.record_event("death", star_index=civilization.star_system.index, civ_id=civilization.civ_id, group_id=civilization.group_id)
                     civilization.star_system = None  # Set the star system to None
                     #self.civilizations.remove(civilization)
     def update_colonizations(self):
@@ -103,7 +209,7 @@ class Cosmos:
                 params = civilization.get_parameters()
                 if params['colonization_attack'] != None:
                     sys.stdout.write("\033[J")  # Clear everything below the current cursor position
-                    print(f"Civilization {civilization.index}-{civilization.group_id} from Star System {civilization.star_system.index} is attacking Star System {params['colonization_attack']['destinatary']} on Year: {global_time}. The attack will arrive on Year: {params['colonization_attack']['attack_arrival']} .\n")
+                    print(f"Civilization {civilization.index}-{civilization.group_id} from Star System {civilization.star_system.index} is attacking Star System {params['colonization_attack']['destinatary']} on Year: {self.global_time}. The attack will arrive on Year: {params['colonization_attack']['attack_arrival']} .\n")
                     colonization={
                     "destinatary": params['colonization_attack']['destinatary'],
                     "Origin":params['colonization_attack']['Origin'],
@@ -117,6 +223,10 @@ class Cosmos:
                     "attack_send_time":params['colonization_attack']['attack_send_time'],
                     }
                     self.colonization_list.append(colonization)
+                    self.record_event("attack_launched", star_index=colonization["Origin"], civ_id=colonization["Sender_id"],
+                                      group_id=colonization["sender_group"], other_star=colonization["destinatary"],
+                                      energy=colonization["attack_energy"], arrival=colonization["attack_arrival"])
+                    self.star_systems[colonization["destinatary"]]  # Materialize the target star on lazy galaxies
     def update_communications(self):
         """
         Updates ongoing communications from each civilization and appends them to the communications list.
@@ -126,15 +236,73 @@ class Cosmos:
                 params = civilization.get_parameters()
                 if params['communications']:  # Check if the civilization has communications
                     for communication in params['communications']:  # Loop through all communications
-                        self.communications_list.append(communication)  # Append each communication
+                        self.post_communication(communication)  # Post each communication
                         #print(f"Communication sent from Civ {civilization.civ_id}: {communication}")
 
+    def post_communication(self, communication):
+        """
+        Logs a unicast or multicast communication and schedules its deliveries.
+        """
+        self.communications_list.append(communication)
+        self.comms_inbox.post(communication)
+        if self.event_store is not None or self.event_hooks:
+            for message in expand_message(communication):
+                self.record_event("message", star_index=message["Origin"], other_star=message["destinatary"],
+                                  arrival=message["mssg_arrival"])
+
+    def record_event(self, kind, **fields):
+        """
+        Records an event of the current year in the event store, if the cosmos has one, and passes it to the event hooks.
+        """
+        if self.event_store is not None:
+            self.event_store.record(kind, self.global_time, **fields)
+        for hook in self.event_hooks:
+            hook(kind, self.global_time, fields)
+
+    def spill_history(self, path=None):
+        """
+        Removes settled colonizations and delivered communications from colonization_list and
+        communications_list, which only the clash, the dashboard and the visualization read, and all of
+        them only look at pending entries. The removed entries are appended to `path` as JSON lines if given.
+
+        Returns:
+        - int: Number of entries removed.
+        """
+        global_time = self.global_time
+        # A colonization still matters while its payment (the year after sending) or its arrival is ahead
+        settled_colonizations = [colonization for colonization in self.colonization_list
+                                 if colonization["attack_arrival"] <= global_time and colonization["attack_send_time"] < global_time]
+        delivered_communications = [communication for communication in self.communications_list
+                                    if max(message["mssg_arrival"] for message in expand_message(communication)) <= global_time]
+        if path is not None and (settled_colonizations or delivered_communications):
+            with open(path, "a") as spill_file:
+                for kind, entries in (("colonization", settled_colonizations), ("communication", delivered_communications)):
+                    for entry in entries:
+                        spill_file.write(json.dumps({"kind": kind, "year": global_time, "entry": entry}) + "\n")
+        if settled_colonizations:
+            self.colonization_list = [colonization for colonization in self.colonization_list
+                                      if not (colonization["attack_arrival"] <= global_time and colonization["attack_send_time"] < global_time)]
+            self.colonizations_spilled += len(settled_colonizations)
+        if delivered_communications:
+            delivered = set(map(id, delivered_communications))
+            self.communications_list = [communication for communication in self.communications_list if id(communication) not in delivered]
+            self.communications_spilled += len(delivered_communications)
+        return len(settled_colonizations) + len(delivered_communications)
+
+    def memory_usage(self):
+        """
+        Returns the estimated bytes held by each subsystem of the cosmos, as measured by its MemoryMonitor
+        (a default one if none is attached), with the monitor's latest tracemalloc sample if enabled.
+        """
+        monitor = self.memory_monitor if self.memory_monitor is not None else MemoryMonitor()
+        return monitor.measure(self)
+
     def _civilizations_clash(self, global_time):  
         """
         Updates the interaction between civilizations and StarSystems and creates the communications resulting from those comms.
         """
-        self.attack_list = []  # Aligns with star_system indices
-        self.comms_recieved_list = []  # Aligns with star_system indices
+        self.attack_list = {}  # Keyed by star_system index
+        self.comms_recieved_list = {}  # Keyed by star_system index
 
         for star_system in self.star_systems:
             self.new_attack = 0  # Initialize new_attack for this star_system
@@ -163,6 +331,7 @@ class Cosmos:
                             self.new_attack += colonization['attack_energy']
                             sys.stdout.write("\033[J")  # Clear everything below the current cursor position
                             print(f"Allied colonization, energy added: {colonization['attack_energy']}\n")
+                            self._record_attack("reinforcement", civilization, colonization)
 
                             # Create communications for allies
                             self.new_comms.append({
@@ -181,8 +350,9 @@ class Cosmos:
                             self.new_attack += -colonization['attack_energy']
                             sys.stdout.write("\033[J")  # Clear everything below the current cursor position
                             print(f"ATTACKED: Civilization {civilization.civ_id}-{civilization.group_id} resisted attack from {colonization['Sender_id']}-{colonization['sender_group']}.\n")
+                            self._record_attack("attack_resisted", civilization, colonization)
                             # revealed position attacker
-                            self.communications_list.append({
+                            self.post_communication({
                                 "destinatary": star_system.index,
                                 "Origin": colonization['Origin'],
                                 "Position": colonization['Origin'],
@@ -195,7 +365,7 @@ class Cosmos:
                                 "mssg_send_time": global_time,
                             })
                             # revelad survival civilization
-                            self.communications_list.append({
+                            self.post_communication({
                                 "destinatary": colonization['Origin'],
                                 "Origin": star_system.index,
                                 "Position": star_system.index,
@@ -211,6 +381,7 @@ class Cosmos:
                             self.new_attack += -colonization['attack_energy']
                             sys.stdout.write("\033[J")  # Clear everything below the current cursor position
                             print(f"ATTACKED: Civilization {civilization.civ_id}-{civilization.group_id} perished in attack from {colonization['Sender_id']}-{colonization['sender_group']}.\n")
+                            self._record_attack("attack_fatal", civilization, colonization)
 
                             # Remaining energy becomes new colonization attempt
                             self.colonization_list.append({
@@ -229,7 +400,8 @@ class Cosmos:
                     elif civilization is None:  # Star system is uninhabited
                         self.panspermia_energy = colonization['attack_energy']
                         new_civ,new_group=self.panspermia(self.panspermia_energy, star_system, colonization['sender_group'])
-                        self.communications_list.append({
+                        self._record_attack("colonization", self.civilizations[new_civ], colonization)
+                        self.post_communication({
                                 "destinatary": colonization['Origin'],
                                 "Origin": star_system.index,
                                 "Position": star_system.index,
@@ -241,7 +413,7 @@ class Cosmos:
                                 "mssg_arrival": int(global_time+colonization['attack_distance']),
                                 "mssg_send_time": global_time,
                             })
-                        self.communications_list.append({
+                        self.post_communication({
                                 "destinatary": star_system.index,
                                 "Origin": colonization['Origin'],
                                 "Position": colonization['Origin'],
@@ -256,19 +428,33 @@ class Cosmos:
                         self.new_attack += self.panspermia_energy
 
             # Append communications received by the star system
-            for communication in self.communications_list:
-                if (communication['mssg_arrival'] == global_time and communication['destinatary'] == star_system.index):
-                    self.new_comms.append(communication)
+            self.new_comms.extend(self.comms_inbox.deliver(global_time, star_system.index))
 
 
-            self.attack_list.append(self.new_attack)  # Append attack aligned with star_system index
-            self.comms_recieved_list.append(self.new_comms)  # Append comms aligned with star_system index
+            self.attack_list[star_system.index] = self.new_attack
+            self.comms_recieved_list[star_system.index] = self.new_comms
   
 
 
         return self.attack_list, self.comms_recieved_list
 
     
+    def _record_attack(self, kind, civilization, colonization):
+        """
+        Records the arrival of an attack on the star of `civilization`.
+        """
+        self.record_event(kind, star_index=colonization["destinatary"], civ_id=civilization.civ_id, group_id=civilization.group_id,
+                          other_star=colonization["Origin"], other_civ=colonization["Sender_id"],
+                          other_group=colonization["sender_group"], energy=colonization["attack_energy"])
+
+    def _record_level_change(self, civilization):
+        """
+        Records the Kardashev transition of a civilization updated this year, if any.
+        """
+        if civilization.prevKL != civilization.kardashev_level:
+            self.record_event("kardashev", star_index=civilization.star_system.index, civ_id=civilization.civ_id,
+                              group_id=civilization.group_id, energy=civilization.energy_consumption)
+
     def panspermia(self,pansnpermia_energy,star_system,group_id):
         """
         Initiates civilizations
@@ -279,13 +465,14 @@ class Cosmos:
             civ_seed = self.random_gen.randint(0, int(1e9))
             new_civ_id=len(self.civilizations) # Assign a unique index
 
-            new_civilization = Civilization(seed=civ_seed, star_system=star_system,civ_id=new_civ_id,group_id=group_id,star_map=Cosmos.star_map)
+            new_civilization = Civilization(seed=civ_seed, star_system=star_system,civ_id=new_civ_id,group_id=group_id,star_map=self.star_map,civilization_groups=self.civilization_groups,awareness_radius=self.awareness_radius,
+                                              random_gen=self.random_streams.stream("civilization", new_civ_id, civ_seed),intelligence_ledger=self.intelligence_ledger,
+                                              attack_planner=self.attack_planner,known_stars=self._known_stars())
             new_civilization.index = new_civ_id  
-            self.civilization_groups[group_id] = [new_civilization]
             new_civilization.group_id = group_id
             sys.stdout.write("\033[J")  # Clear everything below the current cursor position
-            print("Colonized civilization:" + str(new_civilization.index)+"-"+str(new_civilization.group_id)+". On Year: "+str(global_time)+". On Star: "+str(star_system.index)+" with energy: "+str(pansnpermia_energy)+"\n")
-            self.civilizations.append(new_civilization)
+            print("Colonized civilization:" + str(new_civilization.index)+"-"+str(new_civilization.group_id)+". On Year: "+str(self.global_time)+". On Star: "+str(star_system.index)+" with energy: "+str(pansnpermia_energy)+"\n")
+            self._register_civilization(new_civilization)
             return new_civ_id,group_id
     def update(self, global_time):
         """
@@ -294,18 +481,70 @@ class Cosmos:
         Parameters:
         - global_time (int): Current global time step.
         """  
+        self.global_time = global_time
 
         for star_system in self.star_systems:
             star_system.update(global_time)
 
         self.germination_events()
         self.attack_list,self.comms_recieved_list=self._civilizations_clash(global_time)
-        for civilization in self.civilizations:
-            if civilization.star_system is not None:  # Only update active civilizations
-                civilization.update(global_time,attack_energy=self.attack_list[civilization.star_system.index],communications_list=self.comms_recieved_list[civilization.star_system.index])
+        self.comms_inbox.discard_until(global_time)
+        if self.civilization_table is not None:
+            # Batched energy update of every active civilization, then their per-civilization interactions
+            live_civilizations = [civilization for civilization in self.civilizations if civilization.star_system is not None]
+            self.civilization_table.update(global_time, live_civilizations, self.attack_list)
+            for civilization in live_civilizations:
+                civilization.update_interactions(global_time,communications_list=self.comms_recieved_list[civilization.star_system.index])
+                self.civilization_groups.update_energy(civilization)
+                self._record_level_change(civilization)
+        elif self.engine == "workers":
+            # Civilization updates run in the workers and are merged back in civ_id order
+            if self.worker_pool is None:
+                self.worker_pool = CivilizationWorkerPool(self.star_map, self.seed, self.random_streams.mode,
+                                                          self.awareness_radius, self.num_workers,
+                                                          attack_planner=self.attack_planner)
+            live_civilizations = [civilization for civilization in self.civilizations if civilization.star_system is not None]
+            self.worker_pool.update(global_time, live_civilizations, self.attack_list, self.comms_recieved_list)
+            for civilization in live_civilizations:
+                self.civilization_groups.update_energy(civilization)
+                self._record_level_change(civilization)
+        else:
+            for civilization in self.civilizations:
+                if civilization.star_system is not None:  # Only update active civilizations
+                    civilization.update(global_time,attack_energy=self.attack_list[civilization.star_system.index],communications_list=self.comms_recieved_list[civilization.star_system.index])
+                    self.civilization_groups.update_energy(civilization)
+                    self._record_level_change(civilization)
         self.update_colonizations()
         self.update_communications()    
         self.monitor_civilization_energy()
+        for hook in self.step_hooks:
+            hook(self, global_time)
+    def step(self):
+        """
+        Advances the simulation by one year.
+        """
+        self.update(self.global_time + 1)
+
+    def sync_civilizations(self):
+        """
+        Copies the awareness maps of the civilizations living in worker processes back onto the Civilization
+        objects of this process. Only the "workers" engine needs it; the dashboard calls it before reading them.
+        """
+        if self.worker_pool is None:
+            return
+        for civ_id, awareness_map in self.worker_pool.awareness_maps().items():
+            civilization = self.civilizations[civ_id]
+            civilization.awareness_map = awareness_map
+            if civilization.threat_index is not None:
+                civilization.rebuild_threat_index()
+
+    def close(self):
+        """
+        Stops the worker processes of the "workers" engine, if they were started.
+        """
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
     def get_status(self):
         """
         Returns the current status of the cosmos, including star system and civilization data.
@@ -315,9 +554,9 @@ class Cosmos:
                 {
                     "index": star_system.index,
                     "parameters": star_system.get_parameters(),
-                    "position": self.positions[i],
+                    "position": star_system.position,
                     "type": star_system.type
-                } for i, star_system in enumerate(self.star_systems)
+                } for star_system in self.star_systems
             ],
             "civilizations": [
                 {
@@ -330,6 +569,12 @@ class Cosmos:
             "civilization_groups": {
                 group_id: [civ.index for civ in group]
                 for group_id, group in self.civilization_groups.items()
+            },
+            "civilization_group_totals": {
+                group_id: {
+                    "member_count": self.civilization_groups.member_count[group_id],
+                    "total_energy": self.civilization_groups.total_energy[group_id]
+                } for group_id in self.civilization_groups.member_count
             }
         }
         return status
@@ -343,14 +588,22 @@ class Cosmos:
         - star_systems: List of star system objects.
         - civilizations: List of civilization objects.
         """
-                # Update simulation data
-        simulation_data["global_time"] = global_time
-        # Iterate over all stars and civilizations
-        simulation_data["star_systems"] =[]
-        simulation_data["communications_list"]=[]
+        if self.dashboard_detail:
+            self.sync_civilizations()
+        # Build fresh rows and publish them as a new immutable snapshot, so dashboard readers never see a partial update
+        star_rows = []
+        communication_rows = []
+        live_civilizations = {c.star_system.index: c for c in reversed(civilizations) if c.star_system}
         for star in star_systems:
-            civ = next((c for c in civilizations if c.star_system and c.star_system.index == star.index), None)
-            if civ:
+            civ = live_civilizations.get(star.index)
+            if civ and not self.dashboard_detail:
+                # Reduced detail skips the awareness map scans and strings
+                star_rows.append(
+                {"index": star.index, "type": "-", "civilization": f'{civ.civ_id}-{civ.group_id}',
+                "colonizing": "-", "enemies": "-", "allies": "-",
+                "kardashev_level": f"{civ.kardashev_level}",
+                "energy_consumption": f"{civ.energy_consumption}"})
+            elif civ:
                 colonizing = [f"{k}" for k, v in civ.awareness_map.items() if v.get("relationship") == "Colonizing"]
                 enemies = [f"{v['civilization_id']}-{v['group_id']}" for k, v in civ.awareness_map.items() if v.get("relationship") == "Enemy"]
                 allies = [f"{v['civilization_id']}-{v['group_id']}" for k, v in civ.awareness_map.items() if v.get("relationship") == "Ally"]
@@ -359,7 +612,7 @@ class Cosmos:
                 if len(colonizing_str) > 20:
                     colonizing_str = colonizing_str[:20 - 3] + '...'
 
-                simulation_data["star_systems"].append(
+                star_rows.append(
                 {"index": star.index, 
                  "type": "-", 
                  "civilization": f'{civ.civ_id}-{civ.group_id}', 
@@ -370,15 +623,69 @@ class Cosmos:
                 "energy_consumption": f"{civ.energy_consumption}"})
        
             else:
-                simulation_data["star_systems"].append(
+                star_rows.append(
                 {"index": star.index, "type": "-", "civilization": f'-', 
                 "colonizing": f"-", "enemies": f"-", "allies": f"-","kardashev_level": f"-",
                 "energy_consumption": f"-"})
-        for comms in self.communications_list:
-            simulation_data["communications_list"].append(
+        for comms in (message for communication in self.communications_list for message in expand_message(communication)):
+            if not self.dashboard_detail and comms['mssg_arrival'] <= global_time:
+                continue  # Reduced detail only lists messages still in flight
+            communication_rows.append(
             {"destinatary": f"{comms['destinatary']}", "origin": f"{comms['Origin']}", "civ": f"{comms['target_id']}-{comms['target_id']}", 
             "send_time": f"{comms['mssg_send_time']}", "arrival_time": f"{comms['mssg_arrival']}", "mssg_distance": f"{comms['mssg_distance']}"})
- 
+        self.snapshots.publish(global_time, star_rows, communication_rows)
+        self.publish_galaxy_frame(global_time)
+
+    def publish_galaxy_frame(self, global_time):
+        """
+        Publishes the binary frame of the WebGL galaxy view: the color and size of every star and the progress
+        of every attack and message in flight. Star positions are published with the first frame, and again
+        whenever the view of a lazy galaxy grows. Only flights in the air are visited: the attacks still in flight
+        at the previous frame plus those launched since, and the pending deliveries of the comms inbox.
+        """
+        # Like the event driver, count spilled colonizations to find the ones appended since the last frame.
+        # Spills of unframed colonizations can only move the start back, so seen ones are skipped by identity.
+        launched = self.colonization_list[max(0, self._colonizations_framed - self.colonizations_spilled):]
+        self._colonizations_framed = len(self.colonization_list) + self.colonizations_spilled
+        framed = set(map(id, self._attacks_in_flight))
+        in_flight = [colonization for colonization in itertools.chain(
+                         self._attacks_in_flight, (colonization for colonization in launched if id(colonization) not in framed))
+                     if colonization["attack_arrival"] > global_time]
+        self._attacks_in_flight = in_flight
+        messages = list(self.comms_inbox.in_flight(global_time))
+        if self.lazy_stars:
+            # Only materialized stars and flight endpoints are shown, so the catalog is never derived in full
+            view = self._galaxy_view
+            grown = len(view)
+            for star_index in itertools.chain((star_system.index for star_system in self.star_systems),
+                                              (flight["Origin"] for flight in in_flight + messages),
+                                              (flight["destinatary"] for flight in in_flight + messages)):
+                view.setdefault(star_index, len(view))
+            if len(view) != grown or not self._galaxy_positions_published:
+                self.galaxy_stream.publish_positions(np.array([self.star_map[star_index]["position"] for star_index in view],
+                                                              dtype=np.float64).reshape(-1, 3))
+                self._galaxy_positions_published = True
+            view_position = view.__getitem__
+        else:
+            if not self._galaxy_positions_published:
+                self.galaxy_stream.publish_positions(self.star_map.to_arrays().positions)
+                self._galaxy_positions_published = True
+            view_position = int
+        star_states = np.zeros(len(self._galaxy_view) if self.lazy_stars else len(self.star_map), dtype=STAR_STATE)
+        star_states["color"] = EMPTY_STAR_COLOR
+        for civilization in self.civilizations:
+            if civilization.star_system is not None:
+                energy_ratio = civilization.energy_consumption / civilization.star_system.budget_thresholds[2]
+                star_states[view_position(civilization.star_system.index)] = (group_color(civilization.group_id), min(255, 1 + int(energy_ratio * 254)))
+        flights = [(view_position(colonization["Origin"]), view_position(colonization["destinatary"]),
+                    (global_time - colonization["attack_send_time"]) / max(1, colonization["attack_arrival"] - colonization["attack_send_time"]),
+                    FLIGHT_ATTACK, (0, 0, 0))
+                   for colonization in in_flight]
+        flights += [(view_position(message["Origin"]), view_position(message["destinatary"]),
+                     (global_time - message["mssg_send_time"]) / max(1, message["mssg_arrival"] - message["mssg_send_time"]),
+                     FLIGHT_MESSAGE, (0, 0, 0))
+                    for message in messages]
+        self.galaxy_stream.publish_frame(encode_frame(global_time, star_states, np.array(flights, dtype=FLIGHT)))
 
 
     def run_simulation(self,visualization, steps, step_delay, visualization_interval):
@@ -391,7 +698,6 @@ class Cosmos:
         - visualization_interval (int): Number of steps to skip between visual updates.
         """
         print(f"______Starting simulation_____\n\n\n\n")
-        global global_time
         if visualization:
             # Map star types to shapes and colors
             shape_map = {
@@ -441,7 +747,7 @@ class Cosmos:
             #           
             # Only visualize on specified intervals
             if global_time % visualization_interval == 0:
-                self.display_data(global_time, cosmos.star_systems, cosmos.civilizations)
+                self.display_data(global_time, self.star_systems, self.civilizations)
                 if visualization:
                     if step_delay is not None:
                         rate(1 / step_delay)  # Apply delay if provided
@@ -451,11 +757,7 @@ class Cosmos:
                         if civilization.star_system:
                             star_index = civilization.star_system.index
                             star_color = color_map.get(civilization.group_id, vector(1, 1, 1))
-                            energy_ratio = civilization.energy_consumption / (
-                                civilization.star_system.get_parameters()['star_energy_power'] +
-                                civilization.star_system.get_parameters()['planets_power'] +
-                                civilization.star_system.get_parameters()['germination_planet_power']
-                            )
+                            energy_ratio = civilization.energy_consumption / civilization.star_system.budget_thresholds[2]
                             star_objects[star_index].color = star_color
                             star_objects[star_index].radius = 1 + energy_ratio * 5
 
@@ -511,7 +813,7 @@ class Cosmos:
                                 del moving_spheres[colonization["destinatary"]]
 
                     # Draw and manage communication vectors
-                    for communication in self.communications_list:
+                    for communication in (message for communication in self.communications_list for message in expand_message(communication)):
                         start_star = self.star_systems[communication["Origin"]]
                         end_star = self.star_systems[communication["destinatary"]]
 
@@ -575,6 +877,17 @@ class Cosmos:
                                 moving_spirals[communication["destinatary"]].visible = False
                                 del moving_spirals[communication["destinatary"]]
 
+                    # Flights removed by spill_history between ticks are never seen ending: retire their visuals too
+                    ongoing_colonizations = {colonization["destinatary"] for colonization in self.colonization_list
+                                             if colonization["attack_arrival"] > global_time}
+                    ongoing_communications = {message["destinatary"] for communication in self.communications_list
+                                              for message in expand_message(communication) if message["mssg_arrival"] > global_time}
+                    for visuals, ongoing in ((active_arrows, ongoing_colonizations), (moving_spheres, ongoing_colonizations),
+                                             (active_communications, ongoing_communications), (moving_spirals, ongoing_communications)):
+                        for destination in [destination for destination in visuals if destination not in ongoing]:
+                            visuals[destination].visible = False
+                            del visuals[destination]
+
 
 
 
@@ -582,6 +895,25 @@ class Cosmos:
 
 
 
+    def run_event_driven(self, steps, visualization_interval, on_tick=None):
+        """
+        Runs the simulation with the discrete-event driver, which only runs the full update on years with
+        scheduled or sampled events and integrates civilizations across the years in between.
+
+        Parameters:
+        - steps (int): Number of simulation years.
+        - visualization_interval (int): Years between dashboard updates.
+        - on_tick (callable): Called with the year of each visualization tick (defaults to display_data).
+
+        Returns:
+        - EventDrivenDriver: The driver, e.g. to inspect how many years needed a full update.
+        """
+        if on_tick is None:
+            on_tick = lambda year: self.display_data(year, self.star_systems, self.civilizations)
+        driver = EventDrivenDriver(self)
+        driver.run(steps, visualization_interval, on_tick)
+        return driver
+
     def generate_color_map(self,num_colors):
         """
         Generates a color map with `num_colors` distinct colors.
@@ -617,7 +949,26 @@ if __name__ == "__main__":
     flask_thread.start()
 
 
-    cosmos = Cosmos(seed=12345, num_star_systems=num_star_systems)
-    time_steps = int(5*10e4)
-    cosmos.run_simulation(visualization=True,steps=time_steps, step_delay=0.02,visualization_interval=10)
+    if len(sys.argv) > 1:
+        # python Cosmos_Module.py scenario.toml runs a scenario file instead of the default galaxy
+        from Scenario_Module import SCENARIO_DEFAULTS, load_scenario, scenario_config
+        from Golden_Trace_Module import build_cosmos
+        scenario = load_scenario(sys.argv[1])
+        ignored_outputs = sorted(option for option, value in scenario["outputs"].items()
+                                 if value and not SCENARIO_DEFAULTS["outputs"][option])
+        if ignored_outputs:
+            print(f"Warning: the interactive run writes no output files, ignoring {ignored_outputs}; "
+                  f"run the scenario with Scenario_Module.py to write them", file=sys.stderr)
+        cosmos, driver = build_cosmos(scenario_config(scenario))
+        time_steps = scenario["steps"]
+    else:
+        cosmos, driver = Cosmos(seed=12345, num_star_systems=num_star_systems), "yearly"
+        time_steps = int(5*10e4)
+    if driver == "event":
+        # The event driver is headless: only the Flask dashboard is updated, the VPython canvas stays empty
+        print("The event driver runs without the VPython visualization; follow it on the dashboard", file=sys.stderr)
+        cosmos.run_event_driven(time_steps, visualization_interval=10)
+    else:
+        cosmos.run_simulation(visualization=True,steps=time_steps, step_delay=0.02,visualization_interval=10)
+    cosmos.close()
 
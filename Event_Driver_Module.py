@@ -0,0 +1,244 @@
+import heapq
+import math
+from Civilization_Table_Module import GROWTH_RATE
+
+class EventDrivenDriver:
+    def __init__(self, cosmos):
+        """
+        Alternative driver for Cosmos that jumps the global clock from one scheduled event to the next
+        instead of running the full update every year.
+
+        The agenda holds attack arrivals and payments, message arrivals, sampled star danger and
+        germination events, sampled civilization extinction events, the years in which a civilization
+        crosses an energy threshold (Kardashev levels and attack planner triggers) and the years in which
+        the power of a dynamic star hosting a civilization changes or an allied fact of the intelligence
+        ledger reaches a civilization. Only those years run
+        the full Cosmos.update; across the gaps, civilizations grow geometrically in closed form. Star and
+        extinction events of the skipped years are sampled by thinning, so they keep the per-year
+        probabilities of the yearly driver but not its random streams. Energies therefore differ from those
+        of the yearly driver: closed-form growth rounds differently from yearly growth, and the danger and
+        extinction draws differ.
+
+        Parameters:
+        - cosmos (Cosmos): Simulation to drive.
+        """
+        self.cosmos = cosmos
+        self._base = {}  # {civ_id: (year, energy, budget, growth_rate)} of each live civilization at its last full step
+        self._colonization_times = []  # Min-heap of years in which an attack is paid for or arrives
+        self._colonizations_seen = 0  # Colonizations ever added to the cosmos that are already scheduled
+        self.full_steps = 0  # Number of years simulated with the full update
+
+    def run(self, steps, visualization_interval, on_tick=None):
+        """
+        Simulates years up to steps-1, calling on_tick(global_time) on every multiple of visualization_interval,
+        as run_simulation does.
+
+        Parameters:
+        - steps (int): Number of simulation years.
+        - visualization_interval (int): Years between reported ticks.
+        - on_tick (callable): Called with the year of each tick, once the cosmos reflects that year.
+        """
+        if self.cosmos.engine == "workers":
+            raise ValueError("The event driver needs the civilizations in this process; use the scalar or numpy engine")
+        for star_system in self.cosmos.star_systems:
+            if not all(cycle['is_eventual'] for cycle in star_system.danger_cycle_params):
+                raise ValueError("The event driver requires event-based danger cycles only")
+
+        year = self.cosmos.global_time + 1
+        while year < steps:
+            self._full_step(year, on_tick, visualization_interval)
+            next_year = self._next_agenda_year(year, steps)
+            self._fast_forward(year, next_year, on_tick, visualization_interval)
+            year = next_year
+
+    def _full_step(self, year, on_tick, visualization_interval):
+        """
+        Runs the full update of `year` and records the new base state of every live civilization.
+        """
+        self.cosmos.update(year)
+        self.full_steps += 1
+        self._base = {}
+        for civ in self.cosmos.civilizations:
+            if civ.star_system is not None:
+                # The next years use the budget tier of the level just reached
+                total_energy_available = civ.energy_budget()
+                budget = total_energy_available if total_energy_available > 1 else 1
+                growth_rate = GROWTH_RATE if civ.energy_consumption <= total_energy_available else 1
+                self._base[civ.civ_id] = (year, civ.energy_consumption, budget, growth_rate)
+        colonization_list = self.cosmos.colonization_list
+        # Spilled colonizations were all settled, so the unseen ones are still the tail of the list
+        for colonization in colonization_list[self._colonizations_seen - self.cosmos.colonizations_spilled:]:
+            heapq.heappush(self._colonization_times, colonization['attack_send_time'] + 1)
+            heapq.heappush(self._colonization_times, colonization['attack_arrival'])
+        self._colonizations_seen = len(colonization_list) + self.cosmos.colonizations_spilled
+        if on_tick is not None and year % visualization_interval == 0:
+            on_tick(year)
+
+    def _fast_forward(self, year, next_year, on_tick, visualization_interval):
+        """
+        Advances the civilizations through the gap (year, next_year), reporting the ticks inside it,
+        and leaves the cosmos at year next_year-1, ready for the full step of next_year.
+        """
+        first_tick = (year // visualization_interval + 1) * visualization_interval
+        for tick in range(first_tick, next_year, visualization_interval):
+            self._integrate(tick)
+            if on_tick is not None:
+                on_tick(tick)
+        if next_year - 1 > year:
+            self._integrate(next_year - 1)
+
+    def _integrate(self, year):
+        """
+        Sets every live civilization to its closed-form state at `year`: geometric growth from its
+        last full step, capped by its energy budget, with no danger, extinction or attack.
+        """
+        cosmos = self.cosmos
+        cosmos.global_time = year
+        for civ in cosmos.civilizations:
+            if civ.star_system is None or civ.civ_id not in self._base:
+                continue
+            civ.energy_consumption = self._projected_energy(civ, year)
+            civ.extinction_risk = 0
+            civ.attack_energy = 0
+            if cosmos.civilization_table is not None:
+                cosmos.civilization_table.energy_consumption[civ.civ_id] = civ.energy_consumption
+            cosmos.civilization_groups.update_energy(civ)
+
+    def _projected_energy(self, civ, year):
+        base_year, base_energy, budget, growth_rate = self._base[civ.civ_id]
+        try:
+            return max(0, min(base_energy * (1 + growth_rate) ** (year - base_year), budget))
+        except OverflowError:
+            # A civilization over its budget grows at the integer rate 1: long gaps overflow a float, but it
+            # has been capped at its budget since the first skipped year
+            return budget if base_energy > 0 else 0
+
+    def _next_agenda_year(self, year, steps):
+        """
+        Returns the next year after `year` that needs a full update (at most `steps`), and schedules
+        the sampled star and civilization events that trigger in it.
+        """
+        cosmos = self.cosmos
+        candidates = [steps]
+        while self._colonization_times and self._colonization_times[0] <= year:
+            heapq.heappop(self._colonization_times)
+        if self._colonization_times:
+            candidates.append(self._colonization_times[0])
+        cosmos.comms_inbox.discard_until(year)  # Deliveries due by now were collected or missed, as in a yearly update
+        next_arrival = cosmos.comms_inbox.next_arrival()
+        if next_arrival is not None:
+            candidates.append(max(next_arrival, year + 1))
+        germination_years = [1] if year < 1 and cosmos.germination_seeds else []
+        candidates.extend(germination_years)
+        for civ in cosmos.civilizations:
+            if civ.star_system is not None:
+                crossing = self._next_threshold_crossing(civ, year)
+                if crossing is not None:
+                    candidates.append(crossing)
+                budget_change = civ.star_system.next_budget_change(year)  # Dynamic star cycles change the budget tables
+                if budget_change is not None:
+                    candidates.append(budget_change)
+                fact_arrival = civ.next_fact_arrival()  # Allied facts of the intelligence ledger in flight
+                if fact_arrival is not None:
+                    candidates.append(max(fact_arrival, year + 1))
+        horizon = min(candidates)
+
+        # Sampled events only matter in the skipped years before everything already scheduled;
+        # the scheduled year itself draws its events in the full update
+        forced_star, forced_civilization = None, None
+        for star_system in cosmos.star_systems:
+            event_year, kind = self._sample_star_event(star_system, year, horizon)
+            if event_year is not None:
+                horizon, forced_star, forced_civilization = event_year, (star_system, kind), None
+        for civ in cosmos.civilizations:
+            if civ.star_system is not None:
+                event_year = self._sample_extinction(civ, year, horizon)
+                if event_year is not None:
+                    horizon, forced_star, forced_civilization = event_year, None, civ
+
+        if forced_star is not None:
+            forced_star[0].forced_events.add(forced_star[1])
+        if forced_civilization is not None:
+            forced_civilization.forced_extinction = True
+        return horizon
+
+    def _next_threshold_crossing(self, civ, year):
+        """
+        Returns the first year after `year` in which the projected energy of `civ` reaches a Kardashev
+        level limit or an attack planner trigger, or None if it never does under its current budget.
+        """
+        energy = civ.energy_consumption
+        if energy <= 0 or civ.civ_id not in self._base:
+            return None
+        _, _, budget, growth_rate = self._base[civ.civ_id]
+        growth = 1 + growth_rate
+        thresholds = [civ.limit_KL_2, civ.limit_KL_3, civ.limit_KL_4, 2*civ.limit_KL_3]
+        max_danger = civ.max_known_danger()
+        if max_danger > 0:
+            thresholds.append(max_danger*10)
+        crossing = None
+        for threshold in thresholds:
+            if energy < threshold <= budget:
+                years = max(1, math.ceil(math.log(threshold / energy) / math.log(growth)))
+                while years > 1 and energy * growth ** (years - 1) >= threshold:
+                    years -= 1
+                while energy * growth ** years < threshold:
+                    years += 1
+                if crossing is None or year + years < crossing:
+                    crossing = year + years
+        return crossing
+
+    def _sample_star_event(self, star_system, year, horizon):
+        """
+        Samples the first danger or germination event of `star_system` in the years (year, horizon).
+        Danger events are sampled by thinning against their peak probability.
+
+        Returns:
+        - (int, str): Year and kind of the event, or (None, None) if none triggers before the horizon.
+        """
+        event_year, kind = None, None
+        genesis_probability = star_system.SSb['germination_power']
+        if genesis_probability > 0:
+            candidate = year + _geometric(star_system.random_gen.at(year, "germination_schedule"), genesis_probability)
+            if candidate < horizon:
+                event_year, kind = candidate, "germination"
+        peak_probability = 10**(-5)
+        random_gen = star_system.random_gen.at(year, "danger_schedule")
+        for cycle in star_system.danger_cycle_params:
+            candidate = year
+            while True:
+                candidate += _geometric(random_gen, peak_probability)
+                if candidate >= horizon or (event_year is not None and candidate >= event_year):
+                    break
+                phase = (2 * math.pi * candidate) / cycle['period']
+                if random_gen.random() * peak_probability < 10**(-8+3*(0.5+0.5*math.cos(phase))):
+                    event_year, kind = candidate, "danger"
+                    break
+        return event_year, kind
+
+    def _sample_extinction(self, civ, year, horizon):
+        """
+        Samples the first extinction event of `civ` in the years (year, horizon), by thinning against
+        the probability at full scarcity.
+        """
+        peak_probability = 1e-8
+        if civ.civ_id not in self._base:
+            return None
+        budget = self._base[civ.civ_id][2]
+        random_gen = civ.random_gen.at(year, "extinction_schedule")
+        candidate = year
+        while True:
+            candidate += _geometric(random_gen, peak_probability)
+            if candidate >= horizon:
+                return None
+            # The extinction check of a year uses the energy the civilization had at the end of the previous one
+            scarcity_factor = self._projected_energy(civ, candidate - 1) / budget
+            if random_gen.random() < scarcity_factor:
+                return candidate
+
+
+def _geometric(random_gen, probability):
+    """
+    Samples the number of yearly Bernoulli(probability) trials up to and including the first success.
+    """
+    return int(math.log(1.0 - random_gen.random()) / math.log1p(-probability)) + 1
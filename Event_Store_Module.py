@@ -0,0 +1,191 @@
+import queue
+import sqlite3
+import threading
+
+EVENT_KINDS = (
+    "birth",  # Civilization germinated on a star
+    "kardashev",  # Civilization changed Kardashev level (energy: new energy consumption)
+    "attack_launched",  # Attack sent from star_index to other_star (arrival: arrival year)
+    "attack_resisted",  # Attack from other_* survived by the civilization on star_index
+    "attack_fatal",  # Attack from other_* destroyed the civilization on star_index
+    "reinforcement",  # Allied colonization from other_* added energy to the civilization on star_index
+    "colonization",  # Attack from other_* founded a new civilization on the empty star_index
+    "death",  # Civilization ran out of energy
+    "message",  # Message sent from star_index to other_star (arrival: arrival year)
+)
+
+COLUMNS = ("year", "kind", "star_index", "civ_id", "group_id", "other_star", "other_civ", "other_group", "energy", "arrival")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    star_index INTEGER,
+    civ_id INTEGER,
+    group_id INTEGER,
+    other_star INTEGER,
+    other_civ INTEGER,
+    other_group INTEGER,
+    energy REAL,
+    arrival INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_year ON events (year);
+CREATE INDEX IF NOT EXISTS events_kind_year ON events (kind, year);
+CREATE INDEX IF NOT EXISTS events_star_year ON events (star_index, year);
+CREATE INDEX IF NOT EXISTS events_civ_year ON events (civ_id, year);
+CREATE INDEX IF NOT EXISTS events_group_year ON events (group_id, year);
+"""
+
+class EventStore:
+    def __init__(self, path, batch_size=1000):
+        """
+        Persists simulation events to a local SQLite database. The simulation only enqueues events;
+        a background writer thread inserts them in batched transactions.
+
+        Parameters:
+        - path (str): Path of the SQLite database file, created if missing.
+        - batch_size (int): Maximum number of events inserted per transaction.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._closed = False
+        self._error = None  # Exception that stopped the writer from inserting events, raised by flush and query
+        connection = sqlite3.connect(path)
+        connection.execute("PRAGMA journal_mode=WAL")  # Readers do not block the writer
+        connection.executescript(SCHEMA)
+        connection.close()
+        self._writer = threading.Thread(target=self._write_events, name="event-store", daemon=True)
+        self._writer.start()
+
+    def record(self, kind, year, star_index=None, civ_id=None, group_id=None,
+               other_star=None, other_civ=None, other_group=None, energy=None, arrival=None):
+        """
+        Queues one event for insertion.
+
+        Parameters:
+        - kind (str): One of EVENT_KINDS.
+        - year (int): Simulation year of the event.
+        - star_index, civ_id, group_id (int): Star the event happens on and its civilization.
+        - other_star, other_civ, other_group (int): Counterpart of the event (attacker, target or message recipient).
+        - energy (float): Energy involved (attack energy, new energy consumption, ...).
+        - arrival (int): Arrival year of attacks and messages.
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind {kind}")
+        if self._closed:
+            raise RuntimeError("The event store is closed")
+        if self._error is not None:
+            raise RuntimeError("The event store writer failed") from self._error
+        # Plain ints and floats, so numpy scalars are not stored as blobs
+        year, star_index, civ_id, group_id, other_star, other_civ, other_group, arrival = (
+            None if value is None else int(value)
+            for value in (year, star_index, civ_id, group_id, other_star, other_civ, other_group, arrival))
+        self._queue.put((year, kind, star_index, civ_id, group_id, other_star, other_civ, other_group,
+                         None if energy is None else float(energy), arrival))
+
+    def _write_events(self):
+        """
+        Writer thread: inserts queued events in transactions of up to batch_size rows until close().
+        After a failed insert it keeps the error and discards the events still queued, so flush never blocks.
+        """
+        connection = sqlite3.connect(self.path)
+        insert = f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            running = len(rows) == len(batch)  # None is the stop sentinel
+            try:
+                if rows and self._error is None:
+                    with connection:
+                        connection.executemany(insert, rows)
+            except Exception as error:
+                self._error = error
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def pending(self):
+        """
+        Returns the number of events queued and not yet committed.
+        """
+        return self._queue.qsize()
+
+    def flush(self):
+        """
+        Blocks until every event recorded so far is committed, and raises the error that stopped
+        the writer, if any.
+        """
+        if self._writer.is_alive():
+            self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("The event store writer failed") from self._error
+
+    def close(self):
+        """
+        Commits the pending events and stops the writer thread. Raises the error that stopped the writer, if any.
+        """
+        self._closed = True
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        if self._error is not None:
+            raise RuntimeError("The event store writer failed") from self._error
+
+    def query(self, kind=None, star_index=None, civ_id=None, group_id=None, year_from=None, year_to=None):
+        """
+        Returns the committed events matching every given filter, ordered by year and insertion order.
+        Pending events are flushed first.
+
+        Parameters:
+        - kind (str or tuple): Event kind, or several kinds.
+        - star_index, civ_id, group_id (int): Star, civilization or group the event happens on.
+        - year_from, year_to (int): Inclusive range of years.
+
+        Returns:
+        - list: One dict per event, with the columns of the events table.
+        """
+        conditions, parameters = [], []
+        if kind is not None:
+            kinds = (kind,) if isinstance(kind, str) else tuple(kind)
+            conditions.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            parameters.extend(kinds)
+        for column, value in (("star_index", star_index), ("civ_id", civ_id), ("group_id", group_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if year_from is not None:
+            conditions.append("year >= ?")
+            parameters.append(year_from)
+        if year_to is not None:
+            conditions.append("year <= ?")
+            parameters.append(year_to)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.flush()
+        connection = sqlite3.connect(self.path)
+        try:
+            cursor = connection.execute(f"SELECT {', '.join(COLUMNS)} FROM events{where} ORDER BY year, id", parameters)
+            return [dict(zip(COLUMNS, row)) for row in cursor]
+        finally:
+            connection.close()
+
+    def attacks_on(self, star_index, year_from=None, year_to=None):
+        """
+        Returns the attacks that arrived on a star between two years: resisted, fatal, allied and colonizing ones.
+        """
+        return self.query(kind=("attack_resisted", "attack_fatal", "reinforcement", "colonization"),
+                          star_index=star_index, year_from=year_from, year_to=year_to)
+
+    def history(self, civ_id):
+        """
+        Returns every event of a civilization, from its birth to its death.
+        """
+        return self.query(civ_id=civ_id)
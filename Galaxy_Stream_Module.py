@@ -0,0 +1,82 @@
+import struct
+import threading
+import uuid
+import colorsys
+import numpy as np
+
+# Binary formats of the WebGL galaxy view (all little endian):
+# - positions: uint32 star count, then float32 x, y, z per star of the view.
+# - frame: FRAME_HEADER (int32 year, uint32 star count, uint32 flight count), then STAR_STATE per star
+#   (uint8 red, green, blue, size) and FLIGHT per attack or message in flight, whose origin and destination
+#   are positions of stars in the view.
+# The view holds every star of eager galaxies in index order; lazy galaxies only show the stars materialized
+# or reached by a flight, in the order they appeared, and republish the positions when the view grows.
+FRAME_HEADER = struct.Struct("<iII")
+STAR_STATE = np.dtype([("color", "u1", 3), ("size", "u1")])
+FLIGHT = np.dtype([("origin", "<u4"), ("destination", "<u4"), ("progress", "<f4"), ("kind", "u1"), ("pad", "u1", 3)])
+FLIGHT_ATTACK = 0
+FLIGHT_MESSAGE = 1
+EMPTY_STAR_COLOR = (90, 90, 90)
+
+def group_color(group_id):
+    """
+    Returns the (red, green, blue) bytes of a civilization group, with golden-ratio spaced hues
+    so colors stay distinct for any number of groups.
+    """
+    rgb = colorsys.hsv_to_rgb((group_id * 0.618033988749895) % 1, 0.85, 1)
+    return tuple(int(channel * 255) for channel in rgb)
+
+def encode_positions(positions):
+    """
+    Packs an (n, 3) array of star positions into the positions buffer.
+    """
+    positions = np.ascontiguousarray(positions, dtype="<f4")
+    return struct.pack("<I", len(positions)) + positions.tobytes()
+
+def encode_frame(global_time, star_states, flights):
+    """
+    Packs one frame from a STAR_STATE array (one row per star) and a FLIGHT array.
+    """
+    return FRAME_HEADER.pack(global_time, len(star_states), len(flights)) + star_states.tobytes() + flights.tobytes()
+
+
+class GalaxyStream:
+    def __init__(self):
+        """
+        Latest binary buffers of the WebGL galaxy view. Positions are published once per cosmos and frames
+        on every dashboard tick; each buffer is swapped in whole with its ETag, like dashboard snapshots.
+        """
+        self._token = uuid.uuid4().hex[:8]
+        self._publish_lock = threading.Lock()
+        self._version = 0
+        self._positions = (f"{self._token}-p0", encode_positions(np.zeros((0, 3))))  # (etag, bytes)
+        self._frame = (f"{self._token}-f0", encode_frame(0, np.zeros(0, STAR_STATE), np.zeros(0, FLIGHT)))
+
+    def _next_etag(self, prefix):
+        with self._publish_lock:
+            self._version += 1
+            return f"{self._token}-{prefix}{self._version}"
+
+    def publish_positions(self, positions):
+        """
+        Publishes the (n, 3) star positions of the galaxy shown by the view.
+        """
+        self._positions = (self._next_etag("p"), encode_positions(positions))
+
+    def publish_frame(self, frame):
+        """
+        Publishes an encoded frame.
+        """
+        self._frame = (self._next_etag("f"), frame)
+
+    def positions(self):
+        """
+        Returns the (etag, bytes) of the current positions buffer.
+        """
+        return self._positions
+
+    def frame(self):
+        """
+        Returns the (etag, bytes) of the latest frame.
+        """
+        return self._frame
@@ -0,0 +1,314 @@
+import contextlib
+import hashlib
+import io
+import json
+import math
+from Communications_Module import expand_message
+from Statistics_Module import StatisticsAggregator
+
+SECTIONS = ("stars", "civilizations", "awareness", "attacks", "messages", "groups", "events")
+DRIVERS = ("yearly", "event")
+
+def canonical_state(cosmos, events=()):
+    """
+    Returns the canonical state of `cosmos` after its last update, split into SECTIONS. Only state that
+    every engine maintains is included, in a fixed order, with every number as a float so that an int 0
+    and a float 0.0 compare equal:
+    - stars: star power and budget tables of the stars hosting a live civilization. The yearly danger draw
+      is left out: it is an input of the year, already reflected in the civilization energies, and the
+      event driver does not refresh it on the years it skips.
+    - civilizations: star, group, Kardashev level and energy of every civilization ever born.
+    - awareness: the entries of each live civilization's awareness map that hold intelligence.
+    - attacks: the colonizations still to be paid for or to arrive.
+    - messages: the message deliveries still pending.
+    - groups: live members and summed energy of every group.
+    - events: the events recorded since the previous sample, in recording order.
+
+    Parameters:
+    - cosmos (Cosmos): Simulation to describe.
+    - events (list): (kind, year, fields) events recorded since the previous sample.
+    """
+    cosmos.sync_civilizations()
+    global_time = cosmos.global_time
+    live_civilizations = [civ for civ in cosmos.civilizations if civ.star_system is not None]
+    return {
+        "stars": {civ.star_system.index: {"power": _number(civ.star_system.SSb["star_energy_power"]),
+                                          "thresholds": _numbers(civ.star_system.budget_thresholds),
+                                          "tiers": _numbers(civ.star_system.budget_tiers)}
+                  for civ in sorted(live_civilizations, key=lambda civ: civ.star_system.index)},
+        "civilizations": {civ.civ_id: {"star": civ.star_system.index if civ.star_system is not None else None,
+                                       "group": civ.group_id, "level": civ.kardashev_level,
+                                       "energy": _number(civ.energy_consumption)}
+                          for civ in cosmos.civilizations},
+        "awareness": {civ.civ_id: {star_index: {"civ": data["civilization_id"], "group": data["group_id"],
+                                                "relationship": data["relationship"],
+                                                "energy": _number(data["known_energy"]), "time_stamp": data["time_stamp"]}
+                                   for star_index, data in sorted(civ.awareness_map.items())
+                                   if data["relationship"] is not None}
+                      for civ in live_civilizations},
+        "attacks": sorted(({"send_time": colonization["attack_send_time"], "arrival": colonization["attack_arrival"],
+                            "origin": colonization["Origin"], "destination": colonization["destinatary"],
+                            "sender": colonization["Sender_id"], "group": colonization["sender_group"],
+                            "energy": _number(colonization["attack_energy"])}
+                           for colonization in cosmos.colonization_list
+                           if not (colonization["attack_arrival"] <= global_time and colonization["attack_send_time"] < global_time)),
+                          key=_sort_key),
+        "messages": sorted(({"arrival": message["mssg_arrival"], "destination": message["destinatary"],
+                             "origin": message["Origin"], "position": message["Position"],
+                             "target": message["target_id"], "group": message["target_group"],
+                             "energy": _number(message["target_energy"]), "time_stamp": message["time_stamp"]}
+                            for communication in cosmos.communications_list for message in expand_message(communication)
+                            if message["mssg_arrival"] > global_time),
+                           key=_sort_key),
+        "groups": {group_id: {"members": cosmos.civilization_groups.member_count[group_id],
+                              "energy": _number(cosmos.civilization_groups.total_energy[group_id])}
+                   for group_id in sorted(cosmos.civilization_groups.member_count)},
+        "events": [dict({key: _number(value) if key == "energy" or isinstance(value, float) else value
+                         for key, value in fields.items()}, kind=kind, year=year)
+                   for kind, year, fields in events],
+    }
+
+def _sort_key(row):
+    return json.dumps(row, sort_keys=True)
+
+def _number(value):
+    return None if value is None else float(value)
+
+def _numbers(values):
+    return None if values is None else [float(value) for value in values]
+
+def hash_state(state):
+    """
+    Returns {section: digest} of a canonical state. Floats are written with their shortest exact
+    representation, so equal digests mean bit-identical states.
+    """
+    return {section: hashlib.sha256(json.dumps(state[section], sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+            for section in state}
+
+def first_difference(a, b, path=""):
+    """
+    Returns (path, value_a, value_b) of the first difference between two canonical values, or None.
+    Paths read like "[3].energy": list positions in brackets, then dict keys.
+    """
+    if isinstance(a, list) and isinstance(b, list):
+        for index, (item_a, item_b) in enumerate(zip(a, b)):
+            difference = first_difference(item_a, item_b, f"{path}[{index}]")
+            if difference is not None:
+                return difference
+        if len(a) != len(b):
+            return (f"{path}.length", len(a), len(b))
+        return None
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b)):
+            difference = first_difference(a.get(key), b.get(key), f"{path}[{key}]" if isinstance(key, int) else f"{path}.{key}")
+            if difference is not None:
+                return difference
+        return None
+    return None if a == b else (path, a, b)
+
+
+def build_cosmos(config):
+    """
+    Builds the Cosmos of a configuration.
+
+    Parameters:
+    - config (dict): seed, num_star_systems, an optional "driver" ("yearly" or "event") and any other
+      keyword arguments of Cosmos (engine, rng, lazy_stars, intelligence, ...).
+
+    Returns:
+    - (Cosmos, str): The simulation and its driver.
+    """
+    from Cosmos_Module import Cosmos  # Imported here: Cosmos pulls in the visualization and the dashboard
+    options = dict(config)
+    driver = options.pop("driver", "yearly")
+    if driver not in DRIVERS:
+        raise ValueError(f"Unknown driver {driver}")
+    return Cosmos(options.pop("seed"), options.pop("num_star_systems"), **options), driver
+
+def run_configuration(config, steps, interval=1, on_sample=None, hooks=(), stdout=None):
+    """
+    Runs a configuration for `steps` years without printing and calls on_sample(year, state) with the
+    canonical state of every year that is a multiple of `interval`.
+
+    Parameters:
+    - config (dict): Configuration, as taken by build_cosmos.
+    - steps (int): Number of simulation years.
+    - interval (int): Years between samples. The event driver only stops on these years.
+    - on_sample (callable): Receives (year, canonical state); may return True to stop the run.
+    - hooks (tuple): Objects with an attach(cosmos) method, e.g. a StatisticsAggregator.
+    - stdout (file): Optional text stream receiving what the simulation prints (discarded by default).
+
+    Returns:
+    - Cosmos: The simulation, at its last simulated year, with its worker processes stopped.
+    """
+    cosmos, driver = build_cosmos(config)
+    events = []
+    cosmos.event_hooks.append(lambda kind, year, fields: events.append((kind, year, dict(fields))))
+    for hook in hooks:
+        hook.attach(cosmos)
+
+    class StopRun(Exception):
+        pass
+
+    def sample(year):
+        if on_sample is not None:
+            stop = on_sample(year, canonical_state(cosmos, events))
+            events.clear()
+            if stop:
+                raise StopRun()
+
+    with contextlib.redirect_stdout(stdout if stdout is not None else io.StringIO()):
+        try:
+            if driver == "event":
+                cosmos.run_event_driven(steps, interval, sample)
+            else:
+                for year in range(cosmos.global_time + 1, steps):
+                    cosmos.update(year)
+                    if year % interval == 0:
+                        sample(year)
+        except StopRun:
+            pass
+        finally:
+            cosmos.close()
+    return cosmos
+
+def record_trace(config, steps, interval=1):
+    """
+    Returns the golden trace of a configuration: [(year, {section: digest}), ...] for every sampled year.
+    """
+    trace = []
+    run_configuration(config, steps, interval, lambda year, state: trace.append((year, hash_state(state))))
+    return trace
+
+def state_at(config, year, interval=1):
+    """
+    Returns the canonical state of a configuration on a sampled `year`.
+    """
+    states = {}
+    def keep(sample_year, state):
+        if sample_year == year:
+            states["state"] = state
+            return True
+    run_configuration(config, year + 1, interval, keep)
+    return states.get("state")
+
+def compare_configurations(config_a, config_b, steps, interval=1, sections=SECTIONS, golden_trace=None):
+    """
+    Runs two configurations and reports where their canonical states first differ.
+
+    Configuration B is compared against the trace of A while it runs and stops at the first diverging year;
+    both configurations are then replayed up to that year to find the first diverging field.
+
+    Parameters:
+    - config_a, config_b (dict): Configurations, as taken by build_cosmos.
+    - steps (int): Number of simulation years.
+    - interval (int): Years between compared samples.
+    - sections (tuple): Sections of the canonical state to compare, among SECTIONS.
+    - golden_trace (list): Optional trace of config_a from record_trace, e.g. stored from a reference build.
+
+    Returns:
+    - dict: None if every sampled year matches, else the first divergence:
+      {"year", "section", "field", "a", "b"}, where field is the path inside the section. Sections whose
+      digests differ although their values compare equal (e.g. an int against a float that the canonical
+      state failed to normalize) are reported with field "digest" and the two digests.
+    """
+    if golden_trace is None:
+        golden_trace = record_trace(config_a, steps, interval)
+    expected = dict(golden_trace)
+    divergence = {}
+
+    def check(year, state):
+        hashes = hash_state(state)
+        reference = expected.get(year)
+        diverging = [section for section in sections if reference is None or reference[section] != hashes[section]]
+        if diverging:
+            divergence.update(year=year, section=diverging[0])
+            return True
+
+    run_configuration(config_b, steps, interval, check)
+    if not divergence:
+        return None
+    year, section = divergence["year"], divergence["section"]
+    state_a, state_b = state_at(config_a, year, interval), state_at(config_b, year, interval)
+    if state_a is None:
+        return {"year": year, "section": section, "field": "", "a": None, "b": state_b[section]}
+    difference = first_difference(state_a[section], state_b[section])
+    if difference is None:
+        difference = ("digest", hash_state(state_a)[section], hash_state(state_b)[section])
+    field, value_a, value_b = difference
+    return {"year": year, "section": section, "field": field, "a": value_a, "b": value_b}
+
+
+def welch_test(stats_a, stats_b):
+    """
+    Returns the two-sided p-value of Welch's test for equal means of two RunningStats, using the normal
+    approximation of the t distribution (adequate from a few dozen values per sample).
+    """
+    if stats_a.count < 2 or stats_b.count < 2:
+        return None
+    standard_error = (stats_a.variance / stats_a.count + stats_b.variance / stats_b.count) ** 0.5
+    if standard_error == 0:
+        return 1.0 if stats_a.mean == stats_b.mean else 0.0
+    z = abs(stats_a.mean - stats_b.mean) / standard_error
+    return math.erfc(z / 2 ** 0.5)
+
+def chi_square_test(histogram_a, histogram_b):
+    """
+    Returns the p-value of the chi-square test that two Histograms with the same bins sample the same
+    distribution, or None without enough data. The chi-square tail uses the Wilson-Hilferty approximation.
+    """
+    counts_a = histogram_a.counts + [histogram_a.underflow, histogram_a.overflow]
+    counts_b = histogram_b.counts + [histogram_b.underflow, histogram_b.overflow]
+    total_a, total_b = sum(counts_a), sum(counts_b)
+    if total_a == 0 or total_b == 0:
+        return None
+    statistic, bins = 0.0, 0
+    for count_a, count_b in zip(counts_a, counts_b):
+        if count_a + count_b == 0:
+            continue
+        bins += 1
+        statistic += (count_a * (total_b / total_a) ** 0.5 - count_b * (total_a / total_b) ** 0.5) ** 2 / (count_a + count_b)
+    degrees = bins - 1
+    if degrees < 1:
+        return 1.0
+    z = ((statistic / degrees) ** (1 / 3) - (1 - 2 / (9 * degrees))) / (2 / (9 * degrees)) ** 0.5
+    return 0.5 * math.erfc(z / 2 ** 0.5)
+
+def statistical_equivalence(config_a, config_b, seeds, steps, alpha=0.01):
+    """
+    Tests whether two configurations that are not meant to be bit-identical (e.g. the event driver, which
+    samples star and extinction events by thinning) produce the same ensemble statistics.
+
+    Each configuration runs once per seed with a StatisticsAggregator; the merged lifetimes, Kardashev level
+    times, alliance sizes and message latencies are compared with Welch's test on the means and a chi-square
+    test on the histograms, and the attack success rates with Welch's test.
+
+    Parameters:
+    - config_a, config_b (dict): Configurations, as taken by build_cosmos, without their seed.
+    - seeds (list): Seeds run by both configurations.
+    - steps (int): Number of simulation years of each run.
+    - alpha (float): Significance level below which a p-value rejects equivalence.
+
+    Returns:
+    - dict: {"equivalent": bool, "tests": {metric: {"mean_p": p, "histogram_p": p}}}. Metrics without
+      enough data in either configuration get None p-values and do not reject equivalence.
+    """
+    aggregators = []
+    for config in (config_a, config_b):
+        merged = StatisticsAggregator()
+        for seed in seeds:
+            aggregator = StatisticsAggregator()
+            run_configuration(dict(config, seed=seed), steps, steps, hooks=(aggregator,))
+            merged.merge(aggregator)
+        aggregators.append(merged)
+    a, b = aggregators
+    distributions = {"civilization_lifetime": (a.lifetime, b.lifetime),
+                     "alliance_size": (a.alliance_size, b.alliance_size),
+                     "message_latency": (a.message_latency, b.message_latency)}
+    distributions.update({f"kardashev_level_{level}_time": (a.level_time[level], b.level_time[level]) for level in a.level_time})
+    tests = {metric: {"mean_p": welch_test(distribution_a.stats, distribution_b.stats),
+                      "histogram_p": chi_square_test(distribution_a.histogram, distribution_b.histogram)}
+             for metric, (distribution_a, distribution_b) in distributions.items()}
+    tests["attack_success_rate"] = {"mean_p": welch_test(a.attack_success, b.attack_success), "histogram_p": None}
+    equivalent = all(p is None or p >= alpha for test in tests.values() for p in test.values())
+    return {"equivalent": equivalent, "tests": tests}
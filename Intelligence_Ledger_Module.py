@@ -0,0 +1,92 @@
+INTELLIGENCE_MODES = ("messages", "ledger")
+COMPACT_CHANGES = 4096  # Changes kept per group before the oldest half is dropped
+
+class IntelligenceLedger:
+    def __init__(self, max_delay):
+        """
+        Versioned intelligence shared by the members of each civilization group, instead of every member relaying
+        the updates of its awareness map to the others in messages. Members still apply the facts they see
+        to their own awareness maps.
+
+        A fact tells the occupant of a star (civilization, group, known energy) as observed on its time_stamp.
+        The member that observes a newer version publishes it once; every other member sees that version from
+        the year the light of the publishing star reaches its own star, and applies it then if it is newer
+        than what it knows.
+
+        Parameters:
+        - max_delay (float): Longest light delay between two stars of the galaxy, in years.
+        """
+        self.max_delay = max_delay
+        self._facts = {}  # {group_id: {star_index: [version, ...]}}, oldest version first
+        self._changes = {}  # {group_id: [star_index, ...]} star of every version published, in publishing order
+        self._changes_dropped = {}  # {group_id: number of changes dropped from the front of _changes}
+
+    def publish(self, group_id, star_index, intelligence, origin, global_time):
+        """
+        Adds a version of the fact about `star_index` to the ledger of `group_id`, if it is newer than the latest
+        version and changes the occupant or its known energy.
+
+        Parameters:
+        - group_id (int): Group of the publishing member.
+        - star_index (int): Star the fact is about.
+        - intelligence (dict): target_id, target_group, target_energy and time_stamp of the observation.
+        - origin (int): Star of the publishing member, where the version starts travelling from.
+        - global_time (int): Year of publication.
+
+        Returns:
+        - bool: True if the version was added.
+        """
+        versions = self._facts.setdefault(group_id, {}).setdefault(star_index, [])
+        if versions:
+            latest = versions[-1]
+            if (latest["time_stamp"] >= intelligence["time_stamp"] or
+                (latest["target_id"] == intelligence["target_id"] and
+                 latest["target_group"] == intelligence["target_group"] and
+                 (latest["target_energy"] == intelligence["target_energy"] or intelligence["target_energy"] is None))):
+                return False
+        # Versions older than one already visible to every member are never read again
+        while len(versions) > 1 and versions[1]["published"] + self.max_delay <= global_time:
+            versions.pop(0)
+        versions.append({
+            "target_id": intelligence["target_id"],
+            "target_group": intelligence["target_group"],
+            "target_energy": intelligence["target_energy"],
+            "time_stamp": intelligence["time_stamp"],
+            "origin": origin,
+            "published": global_time,
+        })
+        changes = self._changes.setdefault(group_id, [])
+        changes.append(star_index)
+        if len(changes) > COMPACT_CHANGES:
+            # Members read the changes every year, so only members that fell behind rescan the whole ledger
+            del changes[:COMPACT_CHANGES // 2]
+            self._changes_dropped[group_id] = self._changes_dropped.get(group_id, 0) + COMPACT_CHANGES // 2
+        return True
+
+    def changes(self, group_id, cursor):
+        """
+        Returns the stars whose fact changed in the ledger of `group_id` since `cursor`, and the cursor of the
+        next change. A cursor of None (a member that just joined) or one behind the dropped changes returns
+        every star with a fact.
+        """
+        changes = self._changes.get(group_id, [])
+        dropped = self._changes_dropped.get(group_id, 0)
+        end = dropped + len(changes)
+        if cursor is None or cursor < dropped:
+            return list(self._facts.get(group_id, {})), end
+        return changes[cursor - dropped:], end
+
+    def versions(self, group_id, star_index):
+        """
+        Returns the versions of the fact about `star_index` in the ledger of `group_id`, oldest first.
+        """
+        return self._facts.get(group_id, {}).get(star_index, [])
+
+    def __iter__(self):
+        """
+        Iterates every version held by the ledger.
+        """
+        return (version for facts in self._facts.values() for versions in facts.values() for version in versions)
+
+    def __len__(self):
+        return sum(len(versions) for facts in self._facts.values() for versions in facts.values())
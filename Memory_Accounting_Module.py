@@ -0,0 +1,177 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+
+MITIGATIONS = ("spill_history", "reduce_dashboard", "fail")
+
+class MemoryLimitExceeded(MemoryError):
+    def __init__(self, subsystem, limit, report):
+        """
+        Raised by MemoryMonitor when a soft limit is still exceeded after every other mitigation.
+
+        Parameters:
+        - subsystem (str): Subsystem over its limit ("total" for the sum of all subsystems).
+        - limit (int): Soft limit in bytes.
+        - report (dict): Memory report that exceeded the limit.
+        """
+        self.subsystem = subsystem
+        self.limit = limit
+        self.report = report
+        lines = [f"{subsystem} uses {report['subsystems'].get(subsystem, report['total'])} bytes, over its soft limit of {limit} bytes "
+                 f"on year {report['global_time']}. Estimated bytes per subsystem:"]
+        lines += [f"  {name}: {size}" for name, size in sorted(report["subsystems"].items(), key=lambda item: -item[1])]
+        super().__init__("\n".join(lines))
+
+
+def deep_sizeof(obj, _seen=None):
+    """
+    Returns the bytes of `obj` and of the containers and values it references, counting shared objects once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict) or type(obj).__name__ == "mappingproxy":
+        size += sum(deep_sizeof(key, _seen) + deep_sizeof(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+class MemoryMonitor:
+    def __init__(self, interval=1000, soft_limits=None, mitigations=MITIGATIONS, trace=False, spill_path=None, sample_size=16):
+        """
+        Periodically estimates the bytes held by each subsystem of a Cosmos and applies mitigations
+        when a soft limit is exceeded.
+
+        Estimates are cheap counters: the number of entries of each subsystem times the average deep size
+        of a sample of its entries. Optional tracemalloc sampling adds the traced bytes per source file.
+
+        Parameters:
+        - interval (int): Years between measurements.
+        - soft_limits (dict): {subsystem or "total": bytes}. Subsystems are those reported by measure().
+        - mitigations (tuple): Mitigations tried in order while a limit is exceeded, among MITIGATIONS:
+          "spill_history" moves settled colonizations and delivered messages out of memory,
+          "reduce_dashboard" publishes dashboard snapshots without detail, and
+          "fail" raises MemoryLimitExceeded with the report.
+        - trace (bool): Also sample tracemalloc on every measurement (slows the simulation down).
+        - spill_path (str): JSON-lines file receiving spilled history; None drops it.
+        - sample_size (int): Entries sampled per subsystem to estimate the bytes per entry.
+        """
+        unknown = set(mitigations) - set(MITIGATIONS)
+        if unknown:
+            raise ValueError(f"Unknown mitigations {sorted(unknown)}")
+        self.interval = interval
+        self.soft_limits = dict(soft_limits or {})
+        self.mitigations = tuple(mitigations)
+        self.trace = trace
+        self.spill_path = spill_path
+        self.sample_size = sample_size
+        self.last_report = None
+        self.mitigations_applied = []  # (year, subsystem, mitigation) of every mitigation applied
+        self._next_measurement = 0
+
+    def attach(self, cosmos):
+        """
+        Attaches the monitor to `cosmos` and subscribes it to the step hooks.
+        """
+        cosmos.memory_monitor = self
+        cosmos.step_hooks.append(self.on_step)
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _estimate(self, entries, count):
+        """
+        Estimates the bytes of `count` entries from the average deep size of the first sample_size of them.
+        """
+        sample = []
+        for entry in entries:
+            sample.append(entry)
+            if len(sample) == self.sample_size:
+                break
+        if not sample:
+            return 0
+        return int(sum(deep_sizeof(entry) for entry in sample) / len(sample) * count)
+
+    def measure(self, cosmos):
+        """
+        Returns the memory report of `cosmos`: estimated bytes per subsystem, their total and,
+        when tracing, the traced bytes per source file.
+        """
+        live_civilizations = [civ for civ in cosmos.civilizations if civ.star_system is not None]
+        local_civilizations = cosmos.civilizations
+        awareness_maps = 0
+        if cosmos.worker_pool is not None:
+            # The workers report the awareness maps of the live civilizations with every update
+            entries, sampled_bytes, sampled = cosmos.worker_pool.awareness_stats
+            awareness_maps = int(sampled_bytes / sampled * entries) if sampled else 0
+            local_civilizations = [civ for civ in cosmos.civilizations if civ.star_system is None]
+        awareness_entries = sum(len(civ.awareness_map) for civ in local_civilizations)
+        awareness_maps += self._estimate(
+            (entry for civ in local_civilizations for entry in civ.awareness_map.values()), awareness_entries)
+        snapshot = cosmos.snapshots.current()
+        subsystems = {
+            "awareness_maps": awareness_maps,
+            "communications_list": self._estimate(cosmos.communications_list, len(cosmos.communications_list)),
+            "colonization_list": self._estimate(cosmos.colonization_list, len(cosmos.colonization_list)),
+            "comms_inbox": self._estimate(cosmos.comms_inbox, len(cosmos.comms_inbox)),
+            "dashboard": self._estimate(snapshot.star_systems, len(snapshot.star_systems))
+                         + self._estimate(snapshot.communications_list, len(snapshot.communications_list)),
+            "star_systems": self._estimate((star_system.SSb for star_system in cosmos.star_systems), len(cosmos.star_systems)),
+            "civilizations": self._estimate(({key: value for key, value in civ.__dict__.items() if key != "awareness_map"}
+                                             for civ in live_civilizations), len(live_civilizations)),
+        }
+        if cosmos.civilization_table is not None:
+            subsystems["civilization_table"] = (cosmos.civilization_table.energy_consumption.nbytes
+                                                + cosmos.civilization_table.kardashev_level.nbytes)
+        if cosmos.star_map.distances is not None:
+            subsystems["star_distances"] = cosmos.star_map.distances.nbytes
+        if cosmos.intelligence_ledger is not None:
+            subsystems["intelligence_ledger"] = self._estimate(cosmos.intelligence_ledger, len(cosmos.intelligence_ledger))
+        if cosmos.event_store is not None:
+            subsystems["event_store_queue"] = cosmos.event_store.pending() * 120  # Tuple of 10 scalars per queued event
+        report = {"global_time": cosmos.global_time, "subsystems": subsystems, "total": sum(subsystems.values())}
+        if self.trace and tracemalloc.is_tracing():
+            statistics = tracemalloc.take_snapshot().statistics("filename")
+            report["traced_total"] = sum(statistic.size for statistic in statistics)
+            report["traced_by_file"] = {os.path.basename(statistic.traceback[0].filename): statistic.size
+                                        for statistic in statistics[:10]}
+        return report
+
+    def on_step(self, cosmos, global_time):
+        """
+        Step hook: measures every `interval` years and enforces the soft limits.
+        """
+        if global_time < self._next_measurement:
+            return
+        self._next_measurement = global_time + self.interval
+        self.last_report = self.measure(cosmos)
+        self._enforce(cosmos)
+
+    def _enforce(self, cosmos):
+        """
+        Applies the mitigations in order while a soft limit is exceeded.
+        """
+        for subsystem, limit in self.soft_limits.items():
+            for mitigation in self.mitigations:
+                if self._usage(subsystem) <= limit:
+                    break
+                if mitigation == "fail":
+                    raise MemoryLimitExceeded(subsystem, limit, self.last_report)
+                if mitigation == "spill_history":
+                    cosmos.spill_history(self.spill_path)
+                elif mitigation == "reduce_dashboard" and cosmos.dashboard_detail:
+                    cosmos.dashboard_detail = False
+                    cosmos.display_data(cosmos.global_time, cosmos.star_systems, cosmos.civilizations)  # Replace the detailed snapshot
+                self.mitigations_applied.append((cosmos.global_time, subsystem, mitigation))
+                self.last_report = self.measure(cosmos)
+
+    def _usage(self, subsystem):
+        if subsystem == "total":
+            return self.last_report["total"]
+        return self.last_report["subsystems"].get(subsystem, 0)
@@ -0,0 +1,193 @@
+import math
+import random
+import numpy as np
+
+# Philox4x64-10 constants (Salmon et al., "Parallel random numbers: as easy as 1, 2, 3")
+PHILOX_M0 = 0xD2E7470EE14C6C93
+PHILOX_M1 = 0xCA5A826395121157
+PHILOX_W0 = 0x9E3779B97F4A7C15
+PHILOX_W1 = 0xBB67AE8584CAA73B
+PHILOX_ROUNDS = 10
+MASK_64 = (1 << 64) - 1
+
+ENTITY_KINDS = {"star": 1, "civilization": 2}
+
+# Every random decision of the model has its own purpose, so adding a draw for one purpose never shifts another
+PURPOSES = {
+    "cycle_length": 1,
+    "brightness": 2,
+    "planets_power": 3,
+    "germination_planet_power": 4,
+    "danger": 5,
+    "germination": 6,
+    "extinction": 7,
+    "danger_schedule": 8,
+    "germination_schedule": 9,
+    "extinction_schedule": 10,
+}
+
+def philox4x64(counter, key):
+    """
+    Philox4x64-10 block function: maps a 4-word counter and a 2-word key to 4 random 64-bit words.
+    Same function as numpy.random.Philox, which increments its counter before each block.
+
+    Parameters:
+    - counter (tuple): Four unsigned 64-bit integers.
+    - key (tuple): Two unsigned 64-bit integers.
+    """
+    c0, c1, c2, c3 = counter
+    k0, k1 = key
+    for _ in range(PHILOX_ROUNDS):
+        product0 = PHILOX_M0 * c0
+        product1 = PHILOX_M1 * c2
+        c0, c1, c2, c3 = ((product1 >> 64) ^ c1 ^ k0, product1 & MASK_64,
+                          (product0 >> 64) ^ c3 ^ k1, product0 & MASK_64)
+        k0 = (k0 + PHILOX_W0) & MASK_64
+        k1 = (k1 + PHILOX_W1) & MASK_64
+    return c0, c1, c2, c3
+
+def _mulhilo64(a, b):
+    """
+    Elementwise 64x64 -> 128-bit multiplication of uint64 arrays, as (high, low) words.
+    """
+    mask_32 = np.uint64(0xFFFFFFFF)
+    shift = np.uint64(32)
+    a_lo, a_hi = a & mask_32, a >> shift
+    b_lo, b_hi = b & mask_32, b >> shift
+    lo_lo = a_lo * b_lo
+    hi_lo = a_hi * b_lo
+    lo_hi = a_lo * b_hi
+    cross = (lo_lo >> shift) + (hi_lo & mask_32) + (lo_hi & mask_32)
+    high = a_hi * b_hi + (hi_lo >> shift) + (lo_hi >> shift) + (cross >> shift)
+    return high, a * b
+
+def philox4x64_array(counters, keys):
+    """
+    Vectorized philox4x64 over arrays of counters (n, 4) and keys (n, 2) of dtype uint64.
+
+    Returns:
+    - np.ndarray: (n, 4) uint64 random words, row i equal to philox4x64(counters[i], keys[i]).
+    """
+    c0, c1, c2, c3 = (counters[:, i].copy() for i in range(4))
+    k0, k1 = keys[:, 0].copy(), keys[:, 1].copy()
+    m0, m1 = np.uint64(PHILOX_M0), np.uint64(PHILOX_M1)
+    w0, w1 = np.uint64(PHILOX_W0), np.uint64(PHILOX_W1)
+    with np.errstate(over="ignore"):
+        for _ in range(PHILOX_ROUNDS):
+            high0, low0 = _mulhilo64(m0, c0)
+            high1, low1 = _mulhilo64(m1, c2)
+            c0, c1, c2, c3 = high1 ^ c1 ^ k0, low1, high0 ^ c3 ^ k1, low0
+            k0 = k0 + w0
+            k1 = k1 + w1
+    return np.stack([c0, c1, c2, c3], axis=1)
+
+
+class LegacyRandom(random.Random):
+    def at(self, global_time, purpose, offset=0):
+        """
+        Returns the generator for the draws of `purpose` on `global_time`. Legacy streams are sequential,
+        so every purpose shares this generator and the offset of already consumed draws is ignored.
+        """
+        return self
+
+
+class CounterRandom:
+    def __init__(self, key):
+        """
+        Counter-based random stream of one entity. Draws are a pure function of (key, year, purpose, draw number),
+        so they do not depend on how many draws other years, purposes or entities made before.
+
+        Parameters:
+        - key (tuple): Philox key (two 64-bit words) derived from the cosmos seed and the entity.
+        """
+        self.key = key
+
+    def at(self, global_time, purpose, offset=0):
+        """
+        Returns the draws of `purpose` on `global_time`, starting after the first `offset` of them.
+        """
+        return CounterDraws(self.key, global_time, PURPOSES[purpose], offset)
+
+
+class CounterDraws:
+    def __init__(self, key, global_time, purpose_code, offset=0):
+        """
+        Sequence of uniform draws for one (entity, year, purpose), read 4 at a time from Philox blocks
+        with the counter (year, purpose, block, 0).
+        """
+        self.key = key
+        self.global_time = global_time & MASK_64
+        self.purpose_code = purpose_code
+        self.position = offset
+        self._block = (None, None)  # (block number, words)
+
+    def random(self):
+        """
+        Returns the next uniform draw in [0, 1).
+        """
+        block_number, word = divmod(self.position, 4)
+        if self._block[0] != block_number:
+            self._block = (block_number, philox4x64((self.global_time, self.purpose_code, block_number, 0), self.key))
+        self.position += 1
+        return (self._block[1][word] >> 11) * 2.0 ** -53
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def gauss(self, mu=0.0, sigma=1.0):
+        """
+        Returns a normal draw (Box-Muller), consuming two uniform draws.
+        """
+        radius = math.sqrt(-2.0 * math.log(1.0 - self.random()))
+        return mu + sigma * radius * math.cos(2.0 * math.pi * self.random())
+
+
+class RandomStreams:
+    def __init__(self, seed, mode="legacy"):
+        """
+        Creates the random streams of the stars and civilizations of one cosmos.
+
+        Parameters:
+        - seed (int): Seed of the cosmos.
+        - mode (str): "legacy" gives every entity a sequential random.Random seeded as before, reproducing
+          the original trajectories; "counter" keys every draw by (cosmos seed, entity, year, purpose)
+          with Philox, so draws can be reordered, skipped or batched without changing the results.
+        """
+        if mode not in ("legacy", "counter"):
+            raise ValueError(f"Unknown random stream mode {mode}")
+        self.seed = seed
+        self.mode = mode
+
+    def key(self, kind, entity_id):
+        """
+        Returns the Philox key of an entity: the cosmos seed and the entity kind and id.
+        """
+        return (self.seed & MASK_64, (ENTITY_KINDS[kind] << 56 | entity_id) & MASK_64)
+
+    def stream(self, kind, entity_id, legacy_seed):
+        """
+        Returns the random stream of an entity.
+
+        Parameters:
+        - kind (str): "star" or "civilization".
+        - entity_id (int): Star index or civilization id.
+        - legacy_seed (int): Seed of the entity's random.Random in legacy mode.
+        """
+        if self.mode == "legacy":
+            return LegacyRandom(legacy_seed)
+        return CounterRandom(self.key(kind, entity_id))
+
+    def uniforms(self, kind, entity_ids, global_time, purpose):
+        """
+        Returns the first draw of `purpose` on `global_time` for many entities at once, equal to
+        stream(kind, entity_id, _).at(global_time, purpose).random() for each of them. Counter mode only.
+        """
+        entity_ids = np.asarray(entity_ids, dtype=np.uint64)
+        keys = np.empty((len(entity_ids), 2), dtype=np.uint64)
+        keys[:, 0] = self.seed & MASK_64
+        keys[:, 1] = np.uint64(ENTITY_KINDS[kind] << 56) | entity_ids
+        counters = np.zeros((len(entity_ids), 4), dtype=np.uint64)
+        counters[:, 0] = global_time & MASK_64
+        counters[:, 1] = PURPOSES[purpose]
+        words = philox4x64_array(counters, keys)[:, 0]
+        return (words >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
@@ -0,0 +1,245 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+import traceback
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+from Event_Store_Module import EventStore
+from Golden_Trace_Module import DRIVERS, canonical_state, hash_state, run_configuration
+from Statistics_Module import StatisticsAggregator
+
+# Scenario sections and their defaults, which reproduce the interactive run of Cosmos_Module.py
+SCENARIO_DEFAULTS = {
+    "galaxy": {"seed": 12345, "num_star_systems": 20, "lazy_stars": False, "star_cycle": "static", "star_distances": False},
+    "civilizations": {"germination_seeds": [7, 5], "awareness_radius": None},
+    "engine": {"engine": "scalar", "num_workers": None, "rng": "legacy", "driver": "yearly",
+               "intelligence": "messages", "attack_planner": "scan"},
+    "outputs": {"summary": True, "events": False, "statistics": False, "trace_interval": 0, "log": False},
+}
+DEFAULT_STEPS = int(5*10e4)
+OUTPUT_FILES = {"summary": "summary.json", "events": "events.sqlite", "statistics": "statistics.json",
+                "trace_interval": "trace.jsonl", "log": "stdout.log"}
+TIMING_FILE = "timing.json"  # Written last: a scenario directory holding it is complete
+BATCH_FILE = "batch.json"
+
+def load_scenario(path):
+    """
+    Reads a scenario file, JSON or TOML by extension, and fills in the defaults of every section.
+    TOML files need Python 3.11+ (tomllib).
+
+    A scenario holds an optional "name" (defaults to the file name) and "steps" (simulation years), and the
+    sections of SCENARIO_DEFAULTS:
+    - galaxy: seed, num_star_systems, lazy_stars, star_cycle and star_distances of the Cosmos.
+    - civilizations: germination_seeds, the stars forced to germinate on Year 1, and awareness_radius.
+    - engine: engine, num_workers, rng, driver ("yearly" or "event"), intelligence and attack_planner.
+    - outputs: the files written to the scenario directory. summary (final civilizations and groups),
+      events (EventStore database), statistics (StatisticsAggregator summary), trace_interval (golden
+      trace digests every that many years, 0 for none) and log (everything the simulation prints).
+
+    Parameters:
+    - path (str): Path of the .json or .toml scenario file.
+
+    Returns:
+    - dict: The complete scenario.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        if tomllib is None:
+            raise ValueError(f"TOML scenarios need Python 3.11+ (tomllib), write {path} as JSON instead")
+        with open(path, "rb") as scenario_file:
+            scenario = tomllib.load(scenario_file)
+    elif extension == ".json":
+        with open(path) as scenario_file:
+            scenario = json.load(scenario_file)
+    else:
+        raise ValueError(f"Unknown scenario format {extension} of {path}")
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return complete_scenario(scenario)
+
+def complete_scenario(scenario):
+    """
+    Returns a copy of `scenario` with the defaults of every missing setting, rejecting unknown ones.
+    """
+    unknown = set(scenario) - set(SCENARIO_DEFAULTS) - {"name", "steps"}
+    if unknown:
+        raise ValueError(f"Unknown scenario settings {sorted(unknown)}")
+    complete = {"name": scenario.get("name", "scenario"), "steps": int(scenario.get("steps", DEFAULT_STEPS))}
+    for section, defaults in SCENARIO_DEFAULTS.items():
+        settings = scenario.get(section, {})
+        unknown = set(settings) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown {section} settings {sorted(unknown)} in scenario {complete['name']}")
+        complete[section] = dict(defaults, **settings)
+    if complete["engine"]["driver"] not in DRIVERS:
+        raise ValueError(f"Unknown driver {complete['engine']['driver']} in scenario {complete['name']}")
+    return complete
+
+def scenario_config(scenario):
+    """
+    Returns the configuration of a complete scenario, as taken by Golden_Trace_Module.build_cosmos.
+    """
+    return dict(scenario["galaxy"], **scenario["civilizations"], **scenario["engine"])
+
+def _output_paths(scenario, directory):
+    """
+    Returns {output option: path} of the outputs enabled in a scenario.
+    """
+    return {option: os.path.join(directory, file_name) for option, file_name in OUTPUT_FILES.items()
+            if scenario["outputs"][option]}
+
+def scenario_outputs(scenario, directory):
+    """
+    Returns the paths of the files a scenario writes to `directory`, its timing file last.
+    """
+    return list(_output_paths(scenario, directory).values()) + [os.path.join(directory, TIMING_FILE)]
+
+def scenario_complete(scenario, directory):
+    """
+    Returns True if every output of the scenario already exists in `directory`.
+    """
+    return all(os.path.exists(path) for path in scenario_outputs(scenario, directory))
+
+def _write_json(path, data):
+    """
+    Writes `data` to `path` through a temporary file, so an interrupted run never leaves a partial output.
+    """
+    with open(path + ".tmp", "w") as output_file:
+        json.dump(data, output_file, indent=1)
+    os.replace(path + ".tmp", path)
+
+def run_scenario(scenario, directory):
+    """
+    Runs a complete scenario and writes its outputs and timing to `directory`, replacing earlier outputs.
+
+    Returns:
+    - dict: The timing of the run, also written to the timing file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in scenario_outputs(scenario, directory):
+        for stale_path in (path, path + ".tmp", path + "-wal", path + "-shm"):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+    paths = _output_paths(scenario, directory)
+    config = scenario_config(scenario)
+    event_store = EventStore(paths["events"]) if "events" in paths else None
+    if event_store is not None:
+        config["event_store"] = event_store
+    statistics = StatisticsAggregator() if "statistics" in paths else None
+    trace_interval = scenario["outputs"]["trace_interval"]
+    steps = scenario["steps"]
+
+    started, wall_start, cpu_start = time.time(), time.perf_counter(), time.process_time()
+    log = open(paths["log"], "w") if "log" in paths else None
+    trace = open(paths["trace_interval"] + ".tmp", "w") if "trace_interval" in paths else None
+    try:
+        def on_sample(year, state):
+            if trace is not None:
+                trace.write(json.dumps({"year": year, "digests": hash_state(state)}) + "\n")
+        cosmos = run_configuration(config, steps, interval=trace_interval or steps, on_sample=on_sample,
+                                   hooks=(statistics,) if statistics is not None else (), stdout=log)
+    finally:
+        if log is not None:
+            log.close()
+        if trace is not None:
+            trace.close()
+        if event_store is not None:
+            event_store.close()
+    wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    if trace is not None:
+        os.replace(paths["trace_interval"] + ".tmp", paths["trace_interval"])
+    if statistics is not None:
+        statistics.detach()
+        _write_json(paths["statistics"], statistics.summary())
+    if "summary" in paths:
+        state = canonical_state(cosmos)
+        _write_json(paths["summary"], {
+            "name": scenario["name"],
+            "scenario": scenario,
+            "final_year": cosmos.global_time,
+            "civilizations": state["civilizations"],
+            "groups": state["groups"],
+            "digests": {section: digest for section, digest in hash_state(state).items() if section in ("civilizations", "groups")},
+        })
+    timing = {
+        "name": scenario["name"],
+        "steps": steps,
+        "started": started,
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,  # This process only, not the worker processes of the "workers" engine
+        "years_per_second": steps / wall_seconds if wall_seconds > 0 else None,
+        "process_id": os.getpid(),
+    }
+    _write_json(os.path.join(directory, TIMING_FILE), timing)
+    return timing
+
+def _run_scenario_job(scenario, directory):
+    """
+    Batch job: runs a scenario and returns its (status, timing or traceback) instead of raising.
+    """
+    try:
+        return "done", run_scenario(scenario, directory)
+    except Exception:
+        return "failed", traceback.format_exc()
+
+def run_batch(scenario_paths, output_root, max_workers=None, force=False):
+    """
+    Runs a queue of scenario files in parallel worker processes, each into output_root/<scenario name>,
+    and writes the status and timing of every scenario to the batch file of output_root.
+
+    Scenarios whose outputs all exist are skipped, so an interrupted batch resumes where it stopped.
+    A failing scenario is reported without stopping the others.
+
+    Parameters:
+    - scenario_paths (list): Paths of the .json or .toml scenario files, run in this order.
+    - output_root (str): Directory of the scenario directories.
+    - max_workers (int): Scenarios run at once (defaults to the number of CPUs).
+    - force (bool): Run every scenario again, even those with complete outputs.
+
+    Returns:
+    - list: {"name", "path", "directory", "status", "timing" or "error"} of every scenario, in queue order;
+      status is "done", "skipped" or "failed".
+    """
+    scenarios = [(path, load_scenario(path)) for path in scenario_paths]  # Reject malformed files before running any
+    names = [scenario["name"] for _, scenario in scenarios]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Scenario names must be unique, repeated: {duplicates}")
+    os.makedirs(output_root, exist_ok=True)
+
+    results = []
+    pending = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for path, scenario in scenarios:
+            directory = os.path.join(output_root, scenario["name"])
+            result = {"name": scenario["name"], "path": path, "directory": directory}
+            results.append(result)
+            if not force and scenario_complete(scenario, directory):
+                with open(os.path.join(directory, TIMING_FILE)) as timing_file:
+                    result.update(status="skipped", timing=json.load(timing_file))
+                continue
+            pending[executor.submit(_run_scenario_job, scenario, directory)] = result
+        for future in concurrent.futures.as_completed(pending):
+            result = pending[future]
+            status, outcome = future.result()
+            result["status"] = status
+            result["timing" if status == "done" else "error"] = outcome
+            print(f"{result['name']}: {status}" + (f" in {outcome['wall_seconds']:.1f} s" if status == "done" else ""))
+    _write_json(os.path.join(output_root, BATCH_FILE), results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs a batch of scenario files in parallel.")
+    parser.add_argument("output_root", help="Directory receiving one directory of outputs per scenario")
+    parser.add_argument("scenarios", nargs="+", help="Scenario files (.json or .toml)")
+    parser.add_argument("--workers", type=int, default=None, help="Scenarios run at once (defaults to the CPUs)")
+    parser.add_argument("--force", action="store_true", help="Run scenarios again even if their outputs exist")
+    arguments = parser.parse_args()
+    batch = run_batch(arguments.scenarios, arguments.output_root, arguments.workers, arguments.force)
+    if any(result["status"] == "failed" for result in batch):
+        raise SystemExit(1)
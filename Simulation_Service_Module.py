@@ -0,0 +1,305 @@
+import asyncio
+import functools
+import json
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Cosmos_Module import Cosmos
+from flask_app import SnapshotStore, session_snapshots, session_galaxy_streams
+from Galaxy_Stream_Module import GalaxyStream
+
+class SimulationSession:
+    def __init__(self, session_id, cosmos, executor, chunk_steps=500, time_slice=0.1):
+        """
+        Wraps one Cosmos run hosted by the SimulationService.
+
+        Parameters:
+        - session_id (int): Identifier of the session in its service.
+        - cosmos (Cosmos): Simulation advanced by this session.
+        - executor (Executor): Executor running the CPU-heavy stepping off the event loop.
+        - chunk_steps (int): Maximum years simulated per executor call at unlimited speed.
+        - time_slice (float): Seconds of simulated time per chunk when a speed is set.
+        """
+        self.session_id = session_id
+        self.cosmos = cosmos
+        self.executor = executor
+        self.chunk_steps = chunk_steps
+        self.time_slice = time_slice
+        self.speed = None  # Years per second, None for maximum speed
+        self.target_year = None  # Year the current step or run is heading to
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._stepping = asyncio.Lock()  # Step requests on one session run one after the other
+        self._task = None
+        self._runs = set()  # Step and run_until tasks of the session, foreground or background
+        self.error = None  # Error that ended the latest background run, if any
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def pause(self):
+        """
+        Pauses the session after the chunk currently running in the executor.
+        """
+        self._resumed.clear()
+
+    def resume(self):
+        """
+        Resumes a paused session.
+        """
+        self._resumed.set()
+
+    def set_speed(self, years_per_second):
+        """
+        Limits the session to `years_per_second` simulated years per second, or removes the limit with None.
+        """
+        if years_per_second is not None and years_per_second <= 0:
+            raise ValueError("years_per_second must be positive or None")
+        self.speed = years_per_second
+
+    async def step(self, steps):
+        """
+        Simulates `steps` more years and returns the session status.
+        """
+        async with self._stepping:
+            self.target_year = self.cosmos.global_time + steps
+            try:
+                await self._advance_to(self.target_year)
+            finally:
+                self.target_year = None
+        return self.status()
+
+    async def run_until(self, year):
+        """
+        Simulates until `year` has been simulated and returns the session status.
+        """
+        async with self._stepping:
+            self.target_year = year
+            try:
+                await self._advance_to(year)
+            finally:
+                self.target_year = None
+        return self.status()
+
+    def run(self, coroutine):
+        """
+        Runs a step or run_until coroutine as a task of the session, so close() can cancel it and wait for it.
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+        return task
+
+    def start(self, coroutine):
+        """
+        Runs a step or run_until coroutine in the background, cancelling the previous background run.
+        A failure of the run is kept in `error` and reported by status().
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self.error = None
+        self._task = self.run(coroutine)
+        self._task.add_done_callback(self._background_done)
+        return self._task
+
+    def _background_done(self, task):
+        """
+        Records the exception of a finished background run, which nobody awaits.
+        """
+        if not task.cancelled() and task.exception() is not None:
+            self.error = f"{type(task.exception()).__name__}: {task.exception()}"
+
+    async def _advance_to(self, year):
+        """
+        Steps the cosmos in chunks on the executor, yielding to the event loop between chunks
+        so other sessions and requests are served, and honoring pause and speed.
+        """
+        loop = asyncio.get_running_loop()
+        while self.cosmos.global_time < year:
+            await self._resumed.wait()
+            if self.speed is None:
+                chunk = self.chunk_steps
+            else:
+                chunk = max(1, int(self.speed * self.time_slice))
+            chunk = min(chunk, year - self.cosmos.global_time)
+            started = loop.time()
+            running = loop.run_in_executor(self.executor, self._run_steps, chunk)
+            try:
+                await asyncio.shield(running)
+            except asyncio.CancelledError:
+                # Release the session only once the chunk stops touching the cosmos on its executor thread
+                await asyncio.wait([running])
+                raise
+            if self.speed is not None:
+                await asyncio.sleep(max(0, chunk / self.speed - (loop.time() - started)))
+            else:
+                await asyncio.sleep(0)
+
+    async def close(self):
+        """
+        Cancels every run of the session, waits until none of them is stepping the cosmos on the executor,
+        then closes the cosmos there.
+        """
+        runs = list(self._runs)
+        for run in runs:
+            run.cancel()
+        if runs:
+            await asyncio.wait(runs)
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.cosmos.close)
+
+    def _run_steps(self, steps):
+        """
+        Runs `steps` years of the simulation and publishes the session dashboard. Called on an executor thread.
+        """
+        for _ in range(steps):
+            self.cosmos.step()
+        self.cosmos.display_data(self.cosmos.global_time, self.cosmos.star_systems, self.cosmos.civilizations)
+
+    def status(self):
+        """
+        Returns a JSON-serializable summary of the session.
+        """
+        return {
+            "session": self.session_id,
+            "global_time": self.cosmos.global_time,
+            "target_year": self.target_year,
+            "paused": self.paused,
+            "speed": self.speed,
+            "running": self._stepping.locked(),
+            "civilizations": sum(1 for civ in self.cosmos.civilizations if civ.star_system is not None),
+            "colonizations": len(self.cosmos.colonization_list),
+            "communications": len(self.cosmos.communications_list),
+            "error": self.error,
+        }
+
+
+class SimulationService:
+    def __init__(self, max_workers=None, chunk_steps=500):
+        """
+        Hosts many concurrent Cosmos sessions in one process. Stepping runs on a thread pool in
+        time-sliced chunks, so the asyncio event loop stays responsive to control requests.
+        The dashboard and galaxy view of each session are served at /sessions/<session id>/ and
+        /sessions/<session id>/galaxy by the Flask app.
+
+        Parameters:
+        - max_workers (int): Threads available for stepping sessions (None for the executor default).
+        - chunk_steps (int): Maximum years simulated per chunk at unlimited speed.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cosmos")
+        self.chunk_steps = chunk_steps
+        self.sessions = {}
+        self._session_ids = itertools.count()
+
+    async def create_session(self, seed, num_star_systems, **cosmos_options):
+        """
+        Creates a new session and returns it. The cosmos is built on the executor, so creating a large
+        galaxy does not hold up the other sessions.
+
+        Parameters:
+        - seed (int): Seed of the cosmos.
+        - num_star_systems (int): Number of star systems.
+        - cosmos_options: Extra keyword arguments for Cosmos (e.g. lazy_stars, engine).
+        """
+        session_id = next(self._session_ids)
+        cosmos = await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(Cosmos, seed=seed, num_star_systems=num_star_systems, **cosmos_options))
+        cosmos.snapshots = SnapshotStore()
+        session_snapshots[session_id] = cosmos.snapshots
+        cosmos.galaxy_stream = GalaxyStream()
+        session_galaxy_streams[session_id] = cosmos.galaxy_stream
+        session = SimulationSession(session_id, cosmos, self.executor, chunk_steps=self.chunk_steps)
+        self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Unknown session {session_id}")
+        return session
+
+    async def close_session(self, session_id):
+        """
+        Forgets the session, then cancels its runs and closes its cosmos once no chunk is stepping it.
+        """
+        session = self.sessions.pop(session_id)
+        session_snapshots.pop(session_id, None)
+        session_galaxy_streams.pop(session_id, None)
+        await session.close()
+
+    async def handle_request(self, request):
+        """
+        Executes one control request and returns its response.
+        Requests are dicts with an "op" among create, step, run_until, pause, resume, set_speed, status,
+        list and close. step and run_until wait for completion unless "wait" is false.
+        """
+        op = request.get("op")
+        try:
+            if op == "create":
+                session = await self.create_session(request["seed"], request["num_star_systems"], **request.get("options", {}))
+                return {"ok": True, "status": session.status()}
+            if op == "list":
+                return {"ok": True, "sessions": [session.status() for session in self.sessions.values()]}
+            session = self.get_session(request["session"])
+            if op in ("step", "run_until"):
+                if op == "step":
+                    coroutine = session.step(request["steps"])
+                else:
+                    coroutine = session.run_until(request["year"])
+                if request.get("wait", True):
+                    run = session.run(coroutine)
+                    try:
+                        await asyncio.wait([run])
+                    except asyncio.CancelledError:
+                        run.cancel()  # The connection went away: stop the run too
+                        raise
+                    if run.cancelled():
+                        return {"ok": False, "error": f"Session {session.session_id} was closed"}
+                    return {"ok": True, "status": run.result()}
+                session.start(coroutine)
+            elif op == "pause":
+                session.pause()
+            elif op == "resume":
+                session.resume()
+            elif op == "set_speed":
+                session.set_speed(request.get("years_per_second"))
+            elif op == "close":
+                await self.close_session(session.session_id)
+                return {"ok": True}
+            elif op != "status":
+                raise ValueError(f"Unknown op {op}")
+            return {"ok": True, "status": session.status()}
+        except (KeyError, ValueError, TypeError) as error:
+            return {"ok": False, "error": str(error)}
+        except Exception as error:
+            # Failures of the simulation itself are reported too, rather than dropping the connection
+            return {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Serves JSON-lines requests from one client; each request is answered with one JSON line.
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.handle_request(json.loads(line))
+                except json.JSONDecodeError as error:
+                    response = {"ok": False, "error": str(error)}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=5001):
+        """
+        Serves the JSON-lines control protocol over TCP until cancelled.
+        """
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    flask_thread = threading.Thread(target=Cosmos.start_flask, daemon=True)  # Serves the session dashboards
+    flask_thread.start()
+    asyncio.run(SimulationService().serve())
@@ -0,0 +1,314 @@
+import random
+import bisect
+import itertools
+import math
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from collections.abc import Mapping
+from Star_System_Module import StarSystem
+
+STAR_TYPES = ['G-type', 'K-type', 'M-type','F-type','A-type','B-type','O-type']
+
+def attach_shared_memory(name):
+    """
+    Opens a shared memory block created by another process without registering it with this process'
+    resource tracker, which would otherwise unlink the block when this process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always registers the block
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+class StarCatalog(Mapping):
+    def __init__(self, seed, num_star_systems, stars_density=0.0008):
+        """
+        Initializes a procedural star catalog. The type, seed and position of every star are derived
+        deterministically from (seed, index) on demand, so no per-star storage is needed.
+
+        Parameters:
+        - seed (int): Seed of the cosmos the catalog belongs to.
+        - num_star_systems (int): Number of stars in the galaxy.
+        - stars_density (float): Stars per cubic light year, used to size the simulation volume.
+        """
+        self.seed = seed
+        self.num_star_systems = num_star_systems
+        self.stars_density = stars_density
+        self.volume_simulation = num_star_systems / stars_density
+        self.length_simulation = self.volume_simulation ** (1/3)
+        # Read-only arrays backing array catalogs (None on procedural catalogs)
+        self.positions = None  # (n, 3) float64
+        self.type_codes = None  # (n,) int8 index into STAR_TYPES
+        self.seeds = None  # (n,) int64
+        self.distances = None  # Optional (n, n) float64 pairwise distance matrix
+        self.random_state = None  # State of the cosmos generator after drawing the stars, if drawn from one
+        self._shared_memory = None
+        self._attached = False  # True when the arrays are views over a block published by another catalog
+        self._grid = None  # (cell_size, positions, {cell: star indexes}) built by the first neighbourhood query
+
+    @classmethod
+    def from_random(cls, random_gen, num_star_systems, stars_density=0.0008, with_distances=False):
+        """
+        Builds an array catalog by drawing every star from a shared random generator,
+        reproducing the legacy sequential generation of Cosmos._create_star_systems.
+
+        Parameters:
+        - random_gen (random.Random): Generator of the cosmos, consumed in star index order.
+        - num_star_systems (int): Number of stars in the galaxy.
+        - stars_density (float): Stars per cubic light year.
+        - with_distances (bool): Also precompute the pairwise distance matrix.
+        """
+        catalog = cls(seed=None, num_star_systems=num_star_systems, stars_density=stars_density)
+        stars = [catalog._draw_star(random_gen) for i in range(num_star_systems)]
+        catalog._set_arrays(
+            np.array([star["position"] for star in stars], dtype=np.float64).reshape(num_star_systems, 3),
+            np.array([STAR_TYPES.index(star["type"]) for star in stars], dtype=np.int8),
+            np.array([star["seed"] for star in stars], dtype=np.int64),
+            with_distances=with_distances)
+        catalog.random_state = random_gen.getstate()
+        return catalog
+
+    def to_arrays(self, with_distances=False):
+        """
+        Returns an array-backed copy of this catalog, deriving every star if the catalog is procedural.
+
+        Parameters:
+        - with_distances (bool): Also precompute the pairwise distance matrix.
+        """
+        if self.positions is not None and (self.distances is not None or not with_distances):
+            return self
+        catalog = StarCatalog(self.seed, self.num_star_systems, self.stars_density)
+        catalog.random_state = self.random_state
+        if self.positions is not None:
+            catalog._set_arrays(self.positions, self.type_codes, self.seeds, with_distances=with_distances)
+        else:
+            stars = [self[i] for i in range(self.num_star_systems)]
+            catalog._set_arrays(
+                np.array([star["position"] for star in stars], dtype=np.float64).reshape(self.num_star_systems, 3),
+                np.array([STAR_TYPES.index(star["type"]) for star in stars], dtype=np.int8),
+                np.array([star["seed"] for star in stars], dtype=np.int64),
+                with_distances=with_distances)
+        return catalog
+
+    def _set_arrays(self, positions, type_codes, seeds, distances=None, with_distances=False):
+        """
+        Stores the backing arrays and marks them read-only.
+        """
+        if distances is None and with_distances:
+            deltas = positions[:, None, :] - positions[None, :, :]
+            distances = np.sqrt((deltas ** 2).sum(axis=2))
+        self.positions, self.type_codes, self.seeds, self.distances = positions, type_codes, seeds, distances
+        for array in (self.positions, self.type_codes, self.seeds, self.distances):
+            if array is not None:
+                array.flags.writeable = False
+
+    def _draw_star(self, random_gen):
+        """
+        Draws the seed, type and position of one star from `random_gen`.
+        """
+        half_length = self.length_simulation/2
+        star_seed = random_gen.randint(0, int(1e9))
+        star_type = random_gen.choice(STAR_TYPES)
+        position = (
+            random_gen.uniform(-half_length, half_length),  # X-axis position
+            random_gen.uniform(-half_length, half_length),  # Y-axis position
+            random_gen.uniform(-half_length, half_length)   # Z-axis position
+        )
+        return {"position": position, "type": star_type, "seed": star_seed}
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, np.integer)) or not 0 <= index < self.num_star_systems:
+            raise KeyError(index)
+        if self.positions is not None:
+            return {"position": tuple(self.positions[index].tolist()),
+                    "type": STAR_TYPES[self.type_codes[index]],
+                    "seed": int(self.seeds[index])}
+        return self._draw_star(random.Random(f"{self.seed}:{index}"))
+
+    def __iter__(self):
+        return iter(range(self.num_star_systems))
+
+    def __len__(self):
+        return self.num_star_systems
+
+    def items(self):
+        """
+        Iterates (index, star data) pairs, converting array catalogs in bulk instead of per lookup.
+        """
+        if self.positions is None:
+            return ((index, self[index]) for index in range(self.num_star_systems))
+        return ((index, {"position": tuple(position), "type": STAR_TYPES[type_code], "seed": seed})
+                for index, (position, type_code, seed) in enumerate(
+                    zip(self.positions.tolist(), self.type_codes.tolist(), self.seeds.tolist())))
+
+    def distance(self, index_a, index_b):
+        """
+        Returns the distance between two stars, from the distance matrix when it was precomputed.
+        """
+        if self.distances is not None:
+            return float(self.distances[index_a, index_b])
+        pos1, pos2 = self[index_a]["position"], self[index_b]["position"]
+        return sum((pos1[i] - pos2[i]) ** 2 for i in range(3)) ** 0.5
+
+    def neighbours(self, position, radius):
+        """
+        Returns the indexes of the stars within `radius` light years of `position`, in index order.
+        Stars are bucketed once in a uniform grid whose cells are as wide as the first queried radius,
+        so a query only measures the stars of the cells overlapping its sphere.
+        Only array catalogs answer neighbourhood queries: procedural catalogs place each star from its index
+        alone, so finding the stars of a region would derive every star of the galaxy.
+
+        Parameters:
+        - position (tuple): (x, y, z) center of the query.
+        - radius (float): Query radius in light years.
+        """
+        if self.positions is None:
+            raise ValueError("Neighbourhood queries need an array catalog; procedural catalogs would derive every star")
+        if self._grid is None:
+            positions = self.positions
+            cell_size = radius if radius > 0 else self.length_simulation
+            cells, cell_of_star = np.unique(np.floor(positions / cell_size).astype(np.int64), axis=0, return_inverse=True)
+            order = np.argsort(cell_of_star.ravel(), kind="stable")
+            bounds = np.cumsum(np.bincount(cell_of_star.ravel(), minlength=len(cells)))[:-1]
+            self._grid = (cell_size, positions, dict(zip(map(tuple, cells.tolist()), np.split(order, bounds))))
+        cell_size, positions, grid = self._grid
+        low = [math.floor((position[i] - radius) / cell_size) for i in range(3)]
+        high = [math.floor((position[i] + radius) / cell_size) for i in range(3)]
+        if math.prod(high[i] - low[i] + 1 for i in range(3)) > len(grid):
+            # Wide queries walk the occupied cells instead of every cell of the box
+            buckets = [stars for cell, stars in grid.items() if all(low[i] <= cell[i] <= high[i] for i in range(3))]
+        else:
+            buckets = [grid[cell] for cell in itertools.product(*(range(low[i], high[i] + 1) for i in range(3))) if cell in grid]
+        if not buckets:
+            return []
+        candidates = np.concatenate(buckets)
+        distances = np.sqrt(((positions[candidates] - np.asarray(position)) ** 2).sum(axis=1))
+        return sorted(candidates[distances <= radius].tolist())
+
+    def materialize(self, index, random_streams=None, star_cycle="static"):
+        """
+        Builds the full StarSystem object for the star at `index`.
+
+        Parameters:
+        - index (int): Index of the star.
+        - random_streams (RandomStreams): Optional random streams of the cosmos the star belongs to.
+        - star_cycle (str): Star cycle mode of the StarSystem, "static" or "dynamic".
+        """
+        star_data = self[index]
+        random_gen = random_streams.stream("star", index, star_data["seed"]) if random_streams is not None else None
+        star_system = StarSystem(seed=star_data["seed"], star_type=star_data["type"], random_gen=random_gen, star_cycle=star_cycle)
+        star_system.index = index  # Assign an index to the star system
+        star_system.type = star_data["type"]  # Store star type
+        star_system.position = star_data["position"]
+        return star_system
+
+    def publish(self, with_distances=False):
+        """
+        Copies the catalog arrays into one multiprocessing.shared_memory block and returns a small picklable
+        handle that other processes pass to StarCatalog.attach. The publishing catalog owns the block and
+        must call unlink() once every process is done with it.
+
+        Parameters:
+        - with_distances (bool): Also publish the pairwise distance matrix, computing it if needed.
+        """
+        catalog = self.to_arrays(with_distances=with_distances)
+        arrays = [("positions", catalog.positions), ("type_codes", catalog.type_codes), ("seeds", catalog.seeds)]
+        if catalog.distances is not None:
+            arrays.append(("distances", catalog.distances))
+        layout, offset = [], 0
+        for name, array in arrays:
+            offset = -(-offset // 8) * 8  # Keep every array 8-byte aligned
+            layout.append((name, offset, array.shape, array.dtype.str))
+            offset += array.nbytes
+        self._shared_memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (_, array), (_, array_offset, shape, dtype) in zip(arrays, layout):
+            np.ndarray(shape, dtype=dtype, buffer=self._shared_memory.buf, offset=array_offset)[...] = array
+        return {
+            "name": self._shared_memory.name,
+            "layout": layout,
+            "seed": self.seed,
+            "num_star_systems": self.num_star_systems,
+            "stars_density": self.stars_density,
+            "random_state": self.random_state,
+        }
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attaches zero-copy, read-only views over a catalog published by another process.
+
+        Parameters:
+        - handle (dict): Handle returned by StarCatalog.publish.
+        """
+        catalog = cls(handle["seed"], handle["num_star_systems"], handle["stars_density"])
+        catalog.random_state = handle["random_state"]
+        catalog._shared_memory = attach_shared_memory(handle["name"])
+        catalog._attached = True
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=catalog._shared_memory.buf, offset=offset)
+                  for name, offset, shape, dtype in handle["layout"]}
+        catalog._set_arrays(arrays["positions"], arrays["type_codes"], arrays["seeds"], distances=arrays.get("distances"))
+        return catalog
+
+    def close(self):
+        """
+        Releases this process' mapping of the shared memory block. An attached catalog drops its array views
+        with it; the publishing catalog keeps its own arrays and destroys the block, which could not be
+        unlinked once its mapping is gone.
+        """
+        if self._shared_memory is None:
+            return
+        if not self._attached:
+            self.unlink()
+            return
+        self.positions = self.type_codes = self.seeds = self.distances = None
+        self._grid = None
+        self._shared_memory.close()
+        self._shared_memory = None
+
+    def unlink(self):
+        """
+        Closes and destroys the shared memory block. Only the publishing process should call it.
+        """
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+
+class MaterializedStarSystems:
+    def __init__(self, catalog, random_streams=None, star_cycle="static"):
+        """
+        Holds the StarSystem objects of a lazy galaxy. Indexing materializes a star from the catalog
+        the first time it is touched; iteration only visits stars already materialized, in index order.
+
+        Parameters:
+        - catalog (StarCatalog): Catalog the stars are derived from.
+        - random_streams (RandomStreams): Optional random streams of the cosmos, passed to materialize.
+        - star_cycle (str): Star cycle mode of the materialized stars.
+        """
+        self.catalog = catalog
+        self.random_streams = random_streams
+        self.star_cycle = star_cycle
+        self._star_systems = {}
+        self._indexes = []  # Sorted indexes of the materialized stars
+
+    def __getitem__(self, index):
+        star_system = self._star_systems.get(index)
+        if star_system is None:
+            star_system = self.catalog.materialize(index, self.random_streams, self.star_cycle)
+            self._star_systems[index] = star_system
+            bisect.insort(self._indexes, index)
+        return star_system
+
+    def __contains__(self, index):
+        return index in self._star_systems
+
+    def __iter__(self):
+        return (self._star_systems[index] for index in list(self._indexes))
+
+    def __len__(self):
+        return len(self._indexes)
@@ -1,18 +1,29 @@
-import random
 import math
+from Random_Streams_Module import LegacyRandom
 #import matplotlib.pyplot as plt
 
+STAR_CYCLES = ("static", "dynamic")
+PHASE_TABLE_SIZE = 4096
+# Star power over one cycle relative to the brightness factor, max(0, min(10 sin(phase), 1)), at the start of each phase step
+PHASE_TABLE = tuple(max(0.0, min(10 * math.sin(2 * math.pi * step / PHASE_TABLE_SIZE), 1.0)) for step in range(PHASE_TABLE_SIZE))
+
 class StarSystem:
-    def __init__(self, seed, star_type):
+    def __init__(self, seed, star_type, random_gen=None, star_cycle="static"):
         """
         Initializes the Star System with a deterministic seed and a star type.
 
         Parameters:
         - seed (int): Seed for deterministic random number generation.
         - star_type (str): Type of the star (e.g., 'G-type', 'K-type').
+        - random_gen (LegacyRandom or CounterRandom): Optional random stream from the cosmos RandomStreams,
+          instead of a sequential generator seeded with `seed`.
+        - star_cycle (str): "static" keeps the star power at the brightness factor; "dynamic" modulates it along
+          the star cycle with the sinusoidal brightness, looked up in PHASE_TABLE.
         """
+        if star_cycle not in STAR_CYCLES:
+            raise ValueError(f"Unknown star cycle {star_cycle}")
         self.seed = seed
-        self.random_gen = random.Random(seed)  # Independent random generator for reproducibility
+        self.random_gen = random_gen if random_gen is not None else LegacyRandom(seed)  # Independent random generator for reproducibility
         self.star_type = star_type
         self.SS_L_ref=3.28e11 # Sun luminosity ref in Peta Watts
         self.SSb = {
@@ -27,6 +38,13 @@ class StarSystem:
         self.cycle_length = self._calculate_cycle_length()
         self.brightness_factor = self._get_brightness_factor()
         self.danger_cycle_params = self._calculate_danger_params(self.SSb)
+        self.forced_events = set()  # Events ("danger", "germination") that trigger without a draw on the next update
+        self.star_cycle = star_cycle
+        self._phase_steps_per_year = PHASE_TABLE_SIZE / self.cycle_length
+        self.budget_thresholds = None  # Energy consumption reaching Kardashev levels 2, 3 and 4
+        self.budget_tiers = None  # Energy available below level 2, at level 2 and from level 3
+        self.SSb['star_energy_power'] = self._calculate_star_power(0)
+        self._refresh_budget_tables()
 
 
     def _calculate_cycle_length(self):
@@ -44,7 +62,7 @@ class StarSystem:
             'O-type': (25e6, 35e6)
         }
         cycle_range = star_type_cycle_map.get(self.star_type, (10e6, 20e6))
-        return self.random_gen.uniform(*cycle_range)
+        return self.random_gen.at(-1, "cycle_length").uniform(*cycle_range)
 
     def _get_brightness_factor(self):
         """
@@ -62,20 +80,20 @@ class StarSystem:
         }
         self.SS_L_ref
         brightness_range = star_type_brightness_range.get(self.star_type, (10e6, 20e6))
-        return self.random_gen.uniform(*brightness_range)*self.SS_L_ref
+        return self.random_gen.at(-1, "brightness").uniform(*brightness_range)*self.SS_L_ref
         
 
     def _initialize_planets_power(self):
         """
         Initializes the power available from planets in the star system.
         """
-        return self.random_gen.uniform(300, 3000)
+        return self.random_gen.at(-1, "planets_power").uniform(300, 3000)
 
     def _initialize_germination_planet_power(self):
         """
         Initializes the power available from the germination planet in the star system.
         """
-        return self.random_gen.uniform(21.2, 300)
+        return self.random_gen.at(-1, "germination_planet_power").uniform(21.2, 300)
 
     def _initialize_germination_power(self):
         """
@@ -87,8 +105,43 @@ class StarSystem:
         """
         Calculates the star's energy budget at a given global time based on its cycle.
         """
-        phase = (2 * math.pi * global_time) / self.cycle_length
-        return self.brightness_factor #max(0, min(10 * math.sin(phase) * self.brightness_factor, self.brightness_factor))  # Brightness modulates the energy #removed dynamic behaviour to test a static energy enviroment
+        if self.star_cycle == "static":
+            return self.brightness_factor
+        return PHASE_TABLE[self._phase_step(global_time)] * self.brightness_factor  # Brightness modulates the energy
+
+    def _phase_step(self, global_time):
+        """
+        Returns the PHASE_TABLE step of the star cycle at a given global time.
+        """
+        return int(global_time * self._phase_steps_per_year) % PHASE_TABLE_SIZE
+
+    def next_budget_change(self, global_time):
+        """
+        Returns the first year after `global_time` in which the star power changes, or None for static stars.
+        """
+        if self.star_cycle == "static":
+            return None
+        step = self._phase_step(global_time)
+        first_step = int(global_time * self._phase_steps_per_year)
+        for next_step in range(first_step + 1, first_step + PHASE_TABLE_SIZE + 1):
+            if PHASE_TABLE[next_step % PHASE_TABLE_SIZE] != PHASE_TABLE[step]:
+                year = math.ceil(next_step / self._phase_steps_per_year)
+                while int(year * self._phase_steps_per_year) < next_step:
+                    year += 1
+                return max(year, global_time + 1)
+        return None
+
+    def _refresh_budget_tables(self):
+        """
+        Recomputes the Kardashev level thresholds and the energy budget tiers from the current powers.
+        """
+        germination_power = self.SSb['germination_planet_power']
+        planets_power = self.SSb['planets_power']
+        star_power = self.SSb['star_energy_power']
+        self.budget_thresholds = (germination_power, germination_power + planets_power,
+                                  germination_power + planets_power + star_power)
+        self.budget_tiers = (min(germination_power, star_power), min(germination_power + planets_power, star_power),
+                             min(germination_power + planets_power, star_power) + star_power)
 
     def _calculate_danger_params(self,SSb):
         """
@@ -124,8 +177,9 @@ class StarSystem:
                 self.event_probability = 10**(-8+3*(0.5+0.5*math.cos(phase)))
 
                 # Check if the event should trigger
-                if self.random_gen.random() < self.event_probability:
-                    danger += -cycle['amplitude'] * math.exp(-0.5*(((1 - abs(self.random_gen.gauss(0, (1/ 3))) - 0)/(1 / 9)) ** 2))
+                random_gen = self.random_gen.at(global_time, "danger")
+                if "danger" in self.forced_events or random_gen.random() < self.event_probability:
+                    danger += -cycle['amplitude'] * math.exp(-0.5*(((1 - abs(random_gen.gauss(0, (1/ 3))) - 0)/(1 / 9)) ** 2))
                 else:
                     danger += 0
             else:
@@ -134,8 +188,9 @@ class StarSystem:
         genesis_probability = self.SSb['germination_power'] #/time unit
 
         # Check if the event should trigger
-        if self.random_gen.random() < genesis_probability:
-            self.germination_event = self.random_gen.uniform(14, 15)
+        random_gen = self.random_gen.at(global_time, "germination")
+        if "germination" in self.forced_events or random_gen.random() < genesis_probability:
+            self.germination_event = random_gen.uniform(14, 15)
         else:
             self.germination_event = 0
         danger+=self.germination_event
@@ -148,11 +203,15 @@ class StarSystem:
         Parameters:
         - global_time (int): The current global time step in the simulation.
         """
-        # Update energy budgets
-        self.SSb['star_energy_power'] = self._calculate_star_power(global_time)
+        # Update energy budgets, and their tables only when the star power changes
+        star_power = self._calculate_star_power(global_time)
+        if star_power != self.SSb['star_energy_power']:
+            self.SSb['star_energy_power'] = star_power
+            self._refresh_budget_tables()
 
         # Update resistance to progress (danger)
         self.SSb['danger'] = self._calculate_danger(global_time)
+        self.forced_events.clear()
 
     def get_parameters(self):
         """
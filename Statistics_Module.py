@@ -0,0 +1,274 @@
+import math
+
+class RunningStats:
+    def __init__(self):
+        """
+        Count, mean and variance of a stream of values in constant memory (Welford's algorithm).
+        Two instances merge exactly with Chan's parallel update.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """
+        Adds the values summarized by `other` to this instance.
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """
+        Sample variance (0 for fewer than two values).
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def summary(self):
+        return {"count": self.count, "mean": self.mean, "std": self.variance ** 0.5,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+
+class Histogram:
+    def __init__(self, low, high, bins):
+        """
+        Fixed-bin histogram of the values in [low, high), with underflow and overflow counters.
+
+        Parameters:
+        - low (float): Lower edge of the first bin.
+        - high (float): Upper edge of the last bin.
+        - bins (int): Number of equal-width bins.
+        """
+        self.low = low
+        self.high = high
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value):
+        if value < self.low:
+            self.underflow += 1
+        elif value >= self.high:
+            self.overflow += 1
+        else:
+            self.counts[int((value - self.low) / (self.high - self.low) * len(self.counts))] += 1
+
+    def merge(self, other):
+        if (self.low, self.high, len(self.counts)) != (other.low, other.high, len(other.counts)):
+            raise ValueError("Only histograms with the same bins can be merged")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def edges(self):
+        width = (self.high - self.low) / len(self.counts)
+        return [self.low + i * width for i in range(len(self.counts) + 1)]
+
+    def summary(self):
+        return {"edges": self.edges(), "counts": list(self.counts), "underflow": self.underflow, "overflow": self.overflow}
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Quantile sketch of non-negative values with relative-error guarantees (DDSketch). Values are counted
+        in logarithmic buckets, so memory grows with the logarithm of the value range, not the number of values,
+        and two sketches with the same accuracy merge exactly by adding their bucket counts.
+
+        Parameters:
+        - relative_accuracy (float): Maximum relative error of the returned quantiles.
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}  # {bucket index: count}, bucket i holding values in (gamma**(i-1), gamma**i]
+        self.zero_count = 0  # Values too small for a logarithmic bucket
+        self.count = 0
+
+    def add(self, value):
+        if value < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        self.count += 1
+        if value < 1e-9:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Returns an estimate of the q-quantile (0 <= q <= 1), or None if the sketch is empty.
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)  # Middle of the bucket in relative terms
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class Distribution:
+    def __init__(self, low, high, bins, relative_accuracy=0.01):
+        """
+        Moments, fixed-bin histogram and quantile sketch of one observed quantity.
+        """
+        self.stats = RunningStats()
+        self.histogram = Histogram(low, high, bins)
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        self.stats.add(value)
+        self.histogram.add(value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+
+    def summary(self):
+        summary = self.stats.summary()
+        summary.update({f"p{int(q * 100)}": self.sketch.quantile(q) for q in (0.05, 0.5, 0.95)})
+        summary["histogram"] = self.histogram.summary()
+        return summary
+
+
+class StatisticsAggregator:
+    def __init__(self, alliance_sample_interval=100):
+        """
+        Streams ensemble statistics out of a running Cosmos through its event and step hooks, in memory that
+        does not grow with the run length: civilization lifetime, years spent at each Kardashev level,
+        attack outcomes, alliance size and message latency. Aggregators of different runs or workers
+        merge exactly.
+
+        Parameters:
+        - alliance_sample_interval (int): Years between samples of the size of every live alliance.
+        """
+        self.alliance_sample_interval = alliance_sample_interval
+        self.lifetime = Distribution(0, 100000, 50)
+        self.level_time = {level: Distribution(0, 100000, 50) for level in (1, 2, 3, 4)}
+        self.attack_success = RunningStats()  # 1 for fatal attacks and colonizations, 0 for resisted attacks
+        self.alliance_size = Distribution(0, 100, 100)
+        self.message_latency = Distribution(0, 1000, 100)
+        self._cosmos = None
+        self._births = {}  # {civ_id: birth year} of the live civilizations
+        self._levels = {}  # {civ_id: (level, year it was reached)} of the live civilizations
+        self._next_alliance_sample = 0
+
+    def attach(self, cosmos):
+        """
+        Subscribes to the event and step hooks of `cosmos`.
+        """
+        self._cosmos = cosmos
+        cosmos.event_hooks.append(self.on_event)
+        cosmos.step_hooks.append(self.on_step)
+
+    def detach(self):
+        """
+        Unsubscribes from the cosmos. Civilizations still alive contribute nothing to lifetimes and level times.
+        """
+        if self._cosmos is not None:
+            self._cosmos.event_hooks.remove(self.on_event)
+            self._cosmos.step_hooks.remove(self.on_step)
+            self._cosmos = None
+
+    def on_event(self, kind, year, fields):
+        """
+        Event hook: updates the statistics fed by one Cosmos event.
+        """
+        if kind in ("birth", "colonization"):
+            self._births[fields["civ_id"]] = year
+            self._levels[fields["civ_id"]] = (0, year)
+        if kind == "kardashev":
+            self._close_level(fields["civ_id"], year)
+            self._levels[fields["civ_id"]] = (self._cosmos.civilizations[fields["civ_id"]].kardashev_level, year)
+        elif kind == "death":
+            self._close_level(fields["civ_id"], year)
+            self._levels.pop(fields["civ_id"], None)
+            birth = self._births.pop(fields["civ_id"], None)
+            if birth is not None:
+                self.lifetime.add(year - birth)
+        elif kind in ("attack_fatal", "colonization"):
+            self.attack_success.add(1)
+        elif kind == "attack_resisted":
+            self.attack_success.add(0)
+        elif kind == "message":
+            self.message_latency.add(fields["arrival"] - year)
+
+    def _close_level(self, civ_id, year):
+        """
+        Accounts the years a civilization spent at its current level until `year`.
+        """
+        level, since = self._levels.get(civ_id, (0, year))
+        if level in self.level_time:
+            self.level_time[level].add(year - since)
+
+    def on_step(self, cosmos, global_time):
+        """
+        Step hook: samples the size of every live alliance every alliance_sample_interval years.
+        """
+        if global_time >= self._next_alliance_sample:
+            for group_id, members in cosmos.civilization_groups.member_count.items():
+                if members > 0:
+                    self.alliance_size.add(members)
+            self._next_alliance_sample = global_time + self.alliance_sample_interval
+
+    def merge(self, other):
+        """
+        Adds the statistics of another aggregator, e.g. one returned by a parallel worker.
+        """
+        self.lifetime.merge(other.lifetime)
+        for level, distribution in self.level_time.items():
+            distribution.merge(other.level_time[level])
+        self.attack_success.merge(other.attack_success)
+        self.alliance_size.merge(other.alliance_size)
+        self.message_latency.merge(other.message_latency)
+
+    def summary(self):
+        """
+        Returns the statistics as a JSON-serializable dict.
+        """
+        return {
+            "civilization_lifetime": self.lifetime.summary(),
+            "kardashev_level_time": {level: distribution.summary() for level, distribution in self.level_time.items()},
+            "attack_success_rate": self.attack_success.mean if self.attack_success.count else None,
+            "attacks_resolved": self.attack_success.count,
+            "alliance_size": self.alliance_size.summary(),
+            "message_latency": self.message_latency.summary(),
+        }
+
+    def __getstate__(self):
+        # The cosmos stays behind when an aggregator is sent back from a worker process
+        state = self.__dict__.copy()
+        state["_cosmos"] = None
+        return state
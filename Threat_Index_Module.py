@@ -0,0 +1,75 @@
+import heapq
+
+ATTACK_PLANNERS = ("scan", "indexed")
+COMPACT_RATIO = 2  # Heaps are rebuilt once their stale entries outnumber the live ones this many times
+
+class ThreatIndex:
+    def __init__(self):
+        """
+        Attack planner indexes of one civilization's awareness map, kept up to date as its entries change
+        instead of being recomputed by a scan of the whole map every year.
+
+        - A max-heap of the known energies of enemy stars, ties going to the star that entered the awareness
+          map last, like the last match of an awareness map scan.
+        - A min-heap by distance of the colonization candidates (enemy stars and stars of unknown relationship),
+          ties going to the star that entered the awareness map first, like the first match of a scan.
+
+        Both heaps drop outdated entries lazily when they reach the top.
+        """
+        self._order = {}  # {star_index: position of the star in the awareness map}
+        self._distance = {}  # {star_index: distance from the civilization's star}
+        self._enemy_energy = {}  # {star_index: known energy} of enemies whose energy is known
+        self._candidates = set()  # Enemy stars and stars of unknown relationship
+        self._energy_heap = []  # Max-heap of (-known energy, -order, star_index)
+        self._candidate_heap = []  # Min-heap of (distance, order, star_index)
+
+    def update(self, star_index, entry):
+        """
+        Indexes the current awareness map `entry` of `star_index`. Call it whenever a star enters the
+        awareness map or its relationship or known energy changes.
+        """
+        if star_index not in self._order:
+            self._order[star_index] = len(self._order)
+            self._distance[star_index] = entry["distance"]
+        order = self._order[star_index]
+
+        energy = entry["known_energy"] if entry["relationship"] == "Enemy" else None
+        if energy is None:
+            self._enemy_energy.pop(star_index, None)
+        elif self._enemy_energy.get(star_index) != energy:
+            self._enemy_energy[star_index] = energy
+            heapq.heappush(self._energy_heap, (-energy, -order, star_index))
+            if len(self._energy_heap) > (COMPACT_RATIO + 1) * len(self._enemy_energy):
+                self._energy_heap = [(-energy, -self._order[index], index) for index, energy in self._enemy_energy.items()]
+                heapq.heapify(self._energy_heap)
+
+        if entry["relationship"] in ("Enemy", None):
+            if star_index not in self._candidates:
+                self._candidates.add(star_index)
+                heapq.heappush(self._candidate_heap, (self._distance[star_index], order, star_index))
+                if len(self._candidate_heap) > (COMPACT_RATIO + 1) * len(self._candidates):
+                    self._candidate_heap = [(self._distance[index], self._order[index], index) for index in self._candidates]
+                    heapq.heapify(self._candidate_heap)
+        else:
+            self._candidates.discard(star_index)
+
+    def strongest_enemy(self):
+        """
+        Returns the (star_index, known_energy) of the enemy with the highest known energy, or (None, 0).
+        """
+        heap = self._energy_heap
+        while heap and self._enemy_energy.get(heap[0][2]) != -heap[0][0]:
+            heapq.heappop(heap)
+        return (heap[0][2], -heap[0][0]) if heap else (None, 0)
+
+    def nearest_candidate(self):
+        """
+        Returns the index of the nearest colonization candidate, or None.
+        """
+        heap = self._candidate_heap
+        while heap and heap[0][2] not in self._candidates:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def __len__(self):
+        return len(self._energy_heap) + len(self._candidate_heap)
@@ -1,21 +1,141 @@
-from flask import Flask, render_template
+from flask import Flask, render_template, request, make_response, abort
+from collections import namedtuple
+from types import MappingProxyType
 import threading
 import logging
+import uuid
+from Galaxy_Stream_Module import GalaxyStream
 
 app = Flask(__name__)
 
 logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+Snapshot = namedtuple("Snapshot", ["version", "etag", "global_time", "star_systems", "communications_list"])
+
+class SnapshotStore:
+    def __init__(self):
+        """
+        Holds the latest immutable snapshot of the simulation for the dashboard.
+        The simulation thread publishes complete new snapshots and swaps them in with a single
+        reference assignment, so readers always see one consistent version without locking.
+        """
+        self._token = uuid.uuid4().hex[:8]  # Distinguishes versions of different processes in ETags
+        self._publish_lock = threading.Lock()  # Only serializes publishers; readers never take it
+        self._version = 0
+        self._snapshot = Snapshot(0, f"{self._token}-0", 0, (), ())
+        self._rendered = (None, None)  # (version, html) of the last rendered page
+
+    def publish(self, global_time, star_systems, communications_list):
+        """
+        Freezes the given rows into a new snapshot and makes it the current one.
+
+        Parameters:
+        - global_time (int): Simulation year of the snapshot.
+        - star_systems (list): Star rows (dicts) for the dashboard.
+        - communications_list (list): Communication rows (dicts) for the dashboard.
+
+        Returns:
+        - int: Version of the published snapshot.
+        """
+        star_systems = tuple(MappingProxyType(row) for row in star_systems)
+        communications_list = tuple(MappingProxyType(row) for row in communications_list)
+        with self._publish_lock:
+            self._version += 1
+            self._snapshot = Snapshot(self._version, f"{self._token}-{self._version}", global_time,
+                                      star_systems, communications_list)
+        return self._version
+
+    def current(self):
+        """
+        Returns the latest published snapshot.
+        """
+        return self._snapshot
+
+    def render(self, snapshot, render_function):
+        """
+        Returns the page rendered for `snapshot`, calling `render_function` only for a version not rendered yet.
+        """
+        version, html = self._rendered
+        if version != snapshot.version:
+            html = render_function(snapshot)
+            self._rendered = (snapshot.version, html)
+        return html
+
 # Shared simulation data
-simulation_data = {
-    "global_time": 0,
-    "star_systems": [],
-    "communications_list": []
-}
+snapshots = SnapshotStore()
+galaxy_stream = GalaxyStream()
+session_snapshots = {}  # {session_id: SnapshotStore} of the sessions hosted by a SimulationService
+session_galaxy_streams = {}  # {session_id: GalaxyStream} of the same sessions
+
+def _dashboard_response(snapshots):
+    """
+    Returns the dashboard page of the latest snapshot of a store, or 304 if the client already has it.
+    """
+    snapshot = snapshots.current()
+    if request.if_none_match.contains(snapshot.etag):
+        response = make_response("", 304)
+        response.set_etag(snapshot.etag)
+        return response
+
+    html = snapshots.render(snapshot, lambda snapshot: render_template("index.html",
+                                  global_time=snapshot.global_time, 
+                                  star_systems=snapshot.star_systems, 
+                                  communications_list=snapshot.communications_list))
+    response = make_response(html)
+    response.set_etag(snapshot.etag)
+    return response
 
 @app.route("/")
 def index():
-    
-    return render_template("index.html", 
-                                  global_time=simulation_data["global_time"], 
-                                  star_systems=simulation_data["star_systems"], 
-                                  communications_list=simulation_data["communications_list"])
+    return _dashboard_response(snapshots)
+
+@app.route("/sessions/<int:session_id>/")
+def session_index(session_id):
+    store = session_snapshots.get(session_id)
+    if store is None:
+        abort(404)
+    return _dashboard_response(store)
+
+def _binary_response(etag, data):
+    """
+    Returns `data` as an octet stream with its ETag, or 304 if the client already has it.
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(data)
+        response.headers["Content-Type"] = "application/octet-stream"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def _session_galaxy_stream(session_id):
+    stream = session_galaxy_streams.get(session_id)
+    if stream is None:
+        abort(404)
+    return stream
+
+@app.route("/galaxy")
+def galaxy():
+    return render_template("galaxy.html", base="/galaxy")
+
+@app.route("/galaxy/positions")
+def galaxy_positions():
+    return _binary_response(*galaxy_stream.positions())
+
+@app.route("/galaxy/frame")
+def galaxy_frame():
+    return _binary_response(*galaxy_stream.frame())
+
+@app.route("/sessions/<int:session_id>/galaxy")
+def session_galaxy(session_id):
+    _session_galaxy_stream(session_id)
+    return render_template("galaxy.html", base=f"/sessions/{session_id}/galaxy")
+
+@app.route("/sessions/<int:session_id>/galaxy/positions")
+def session_galaxy_positions(session_id):
+    return _binary_response(*_session_galaxy_stream(session_id).positions())
+
+@app.route("/sessions/<int:session_id>/galaxy/frame")
+def session_galaxy_frame(session_id):
+    return _binary_response(*_session_galaxy_stream(session_id).frame())